@@ -2,7 +2,29 @@
 Nemotron-Instagram Persona Analyzer Skill Core Modules
 """
 
+from .apify_cassette import CassetteSession
 from .apify_client import ApifyInstagramClient
+from .keyword_cache import CachedKeywordGenerator
+from .keyword_planner import KeywordYieldTracker
 from .nemotron_instagram_pipeline import NemotronInstagramPipeline
+from .parameter_sweep import run_parameter_sweep, run_sweep_from_snapshot
+from .persona_index import PersonaIndex, build_persona_index
+from .profile_store import ProfileStore
+from .selection_cache import SelectionCache
+from .snapshot_store import SnapshotReader, SnapshotWriter
 
-__all__ = ["ApifyInstagramClient", "NemotronInstagramPipeline"]
+__all__ = [
+    "ApifyInstagramClient",
+    "CachedKeywordGenerator",
+    "CassetteSession",
+    "KeywordYieldTracker",
+    "NemotronInstagramPipeline",
+    "PersonaIndex",
+    "ProfileStore",
+    "SelectionCache",
+    "SnapshotReader",
+    "SnapshotWriter",
+    "build_persona_index",
+    "run_parameter_sweep",
+    "run_sweep_from_snapshot",
+]
@@ -0,0 +1,271 @@
+"""
+Apify 通信の記録・再生 (カセット)
+
+record モードでは実際の Apify API とのやり取り (リクエスト・レスポンス・所要時間) を
+カセットファイル (JSONL) に1件ずつ追記する。replay モードでは記録順にレスポンスを返し、
+ApifyInstagramClient / NemotronInstagramPipeline の実コードをオフラインで実行できる。
+
+再生時は記録時の所要時間・待機時間 (およびやり取りの間の処理時間) だけ進む仮想時計 (time()) を
+提供し、クライアントのポーリング・時間予算の打ち切り判定を記録時と同じ経過で再現する。
+実際の待ち時間は time_scale 倍に圧縮する (0 で待ち時間なし、1 で記録時と同じ)。
+認証ヘッダーは記録しない。
+"""
+
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+
+
+CASSETTE_FORMAT_VERSION = 1
+
+
+class CassetteMismatchError(Exception):
+    """再生時のリクエストが記録と一致しない"""
+
+
+class _ReplayResponse:
+    """記録済みレスポンス (requests.Response の必要部分のみ)"""
+
+    def __init__(self, interaction: Dict):
+        self.status_code = interaction["status"]
+        self.url = interaction["url"]
+        self._body = interaction.get("response")
+        self.text = interaction.get("text", "")
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} Error (replay): {self.url}", response=self)
+
+    def json(self):
+        if self._body is None:
+            raise ValueError(f"JSON レスポンスが記録されていません: {self.url}")
+        return self._body
+
+
+class CassetteSession:
+    """
+    ApifyInstagramClient に渡す HTTP セッション (記録・再生)
+
+    使用例:
+        session = CassetteSession("cassettes/it_engineer.jsonl", mode="record")
+        client = ApifyInstagramClient(http=session)
+    """
+
+    def __init__(self, path: str, mode: str = "replay", time_scale: float = 0.0):
+        """
+        初期化
+
+        Args:
+            path: カセットファイル
+            mode: "record" (実通信を記録) または "replay" (記録を再生)
+            time_scale: 再生時の待ち時間の倍率 (0 で待ち時間なし)
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"mode は 'record' または 'replay' を指定してください: {mode}")
+
+        self.path = Path(path)
+        self.mode = mode
+        self.time_scale = time_scale
+        self._position = 0
+        self._clock = 0.0
+        self._origin = None
+
+        if mode == "record":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "w", encoding="utf-8")
+            header = {
+                "version": CASSETTE_FORMAT_VERSION,
+                "recorded_at": datetime.now().isoformat(timespec="seconds")
+            }
+            self._file.write(json.dumps(header, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._interactions = []
+        else:
+            if not self.path.exists():
+                raise FileNotFoundError(f"カセットが見つかりません: {self.path}")
+            with open(self.path, encoding="utf-8") as f:
+                lines = [json.loads(line) for line in f if line.strip()]
+            self.header = lines[0] if lines else {}
+            self._interactions = lines[1:]
+            self._file = None
+
+        print(f"📼 Apify カセット ({mode}): {self.path}")
+
+    def get(self, url: str, headers: Optional[Dict] = None, **kwargs):
+        """GET リクエスト"""
+        return self._request("GET", url, headers=headers, **kwargs)
+
+    def post(self, url: str, json: Optional[Dict] = None, headers: Optional[Dict] = None, **kwargs):
+        """POST リクエスト"""
+        return self._request("POST", url, json=json, headers=headers, **kwargs)
+
+    def sleep(self, seconds: float):
+        """ポーリング待機 (再生時は記録した待機時間だけ仮想時計を進め、実際には time_scale 倍だけ待機)"""
+        if self.mode == "record":
+            self._record_sleep(seconds)
+            time.sleep(seconds)
+            return
+
+        if self._position < len(self._interactions) and self._interactions[self._position]["type"] == "sleep":
+            interaction = self._interactions[self._position]
+            self._position += 1
+            self._catch_up(interaction)
+            seconds = interaction["seconds"]
+        self._advance(seconds)
+
+    def time(self) -> float:
+        """現在時刻 (記録時は実時間、再生時は最初の呼び出しを 0 とする仮想時計)"""
+        if self.mode == "record":
+            now = time.time()
+            if self._origin is None:
+                self._origin = now
+            return now
+        return self._clock
+
+    @property
+    def remaining(self) -> int:
+        """未再生のやり取り数"""
+        return len(self._interactions) - self._position if self.mode == "replay" else 0
+
+    def close(self):
+        """記録ファイルのクローズ"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _request(self, method: str, url: str, json: Optional[Dict] = None, headers: Optional[Dict] = None, **kwargs):
+        """リクエストの記録または再生"""
+        if self.mode == "replay":
+            return self._replay(method, url, json)
+
+        at = self._elapsed_since_origin()
+        start_time = time.time()
+        if method == "POST":
+            response = requests.post(url, json=json, headers=headers, **kwargs)
+        else:
+            response = requests.get(url, headers=headers, **kwargs)
+        elapsed = time.time() - start_time
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+
+        self._write({
+            "type": "http",
+            "method": method,
+            "url": url,
+            "request": json,
+            "status": response.status_code,
+            "response": body,
+            "text": response.text if body is None else "",
+            "at": at,
+            "elapsed": elapsed
+        })
+        return response
+
+    def _replay(self, method: str, url: str, json: Optional[Dict]):
+        """記録順にレスポンスを返す (記録時の所要時間だけ仮想時計を進める)"""
+        while self._position < len(self._interactions) and self._interactions[self._position]["type"] != "http":
+            if self._interactions[self._position]["type"] == "sleep":
+                self._catch_up(self._interactions[self._position])
+                self._advance(self._interactions[self._position]["seconds"])
+            self._position += 1
+
+        if self._position >= len(self._interactions):
+            raise CassetteMismatchError(f"カセットの記録を使い切りました: {method} {url}")
+
+        interaction = self._interactions[self._position]
+        if interaction["method"] != method or interaction["url"] != url:
+            raise CassetteMismatchError(
+                f"リクエストが記録と一致しません (#{self._position}): "
+                f"記録={interaction['method']} {interaction['url']} / 実行={method} {url}"
+            )
+        if interaction.get("request") != json:
+            raise CassetteMismatchError(
+                f"リクエスト本文が記録と一致しません (#{self._position}): "
+                f"記録={interaction.get('request')} / 実行={json}"
+            )
+        self._position += 1
+        self._catch_up(interaction)
+        self._advance(interaction.get("elapsed", 0))
+
+        return _ReplayResponse(interaction)
+
+    def _catch_up(self, interaction: Dict):
+        """記録時の開始時刻まで仮想時計を進める (やり取りの間の処理時間の再現)"""
+        if "at" in interaction and interaction["at"] > self._clock:
+            self._advance(interaction["at"] - self._clock)
+
+    def _advance(self, seconds: float):
+        """仮想時計を進める (time_scale > 0 の場合は実際にも待機)"""
+        self._clock += seconds
+        if self.time_scale > 0:
+            time.sleep(seconds * self.time_scale)
+
+    def _record_sleep(self, seconds: float):
+        """ポーリング待機の記録 (再生時は sleep() 経由で圧縮)"""
+        self._write({"type": "sleep", "at": self._elapsed_since_origin(), "seconds": seconds})
+
+    def _elapsed_since_origin(self) -> float:
+        """記録時の経過時間 (最初の time() 呼び出しまたはリクエストを 0 とする)"""
+        now = self.time()
+        return now - self._origin
+
+    def _write(self, interaction: Dict):
+        """1件追記"""
+        self._file.write(json.dumps(interaction, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+
+# CLI エントリーポイント (再生による所要時間・メモリ計測)
+if __name__ == "__main__":
+    import argparse
+    import tracemalloc
+
+    from nemotron_instagram_pipeline import NemotronInstagramPipeline
+
+    parser = argparse.ArgumentParser(
+        description="記録済みカセットでパイプラインを再生し、所要時間とメモリ使用量を計測"
+    )
+    parser.add_argument("cassette", type=str, help="カセットファイル")
+    parser.add_argument("target", type=str, help="記録時と同じターゲット記述")
+    parser.add_argument("--max-personas", type=int, default=3, help="最大選定ペルソナ数 (記録時と同じ値)")
+    parser.add_argument("--max-posts", type=int, default=20, help="キーワードあたりの最大投稿数 (記録時と同じ値)")
+    parser.add_argument("--repeat", type=int, default=3, help="繰り返し回数 (デフォルト: 3)")
+    parser.add_argument("--time-scale", type=float, default=0.0, help="待ち時間の倍率 (デフォルト: 0)")
+
+    args = parser.parse_args()
+
+    measurements = []
+    for i in range(args.repeat):
+        session = CassetteSession(args.cassette, mode="replay", time_scale=args.time_scale)
+        pipeline = NemotronInstagramPipeline(apify_token="replay", apify_http=session)
+
+        tracemalloc.start()
+        start_time = time.time()
+        pipeline.run(
+            target_description=args.target,
+            max_personas=args.max_personas,
+            max_posts_per_keyword=args.max_posts
+        )
+        elapsed = time.time() - start_time
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        measurements.append((elapsed, peak))
+        print(f"\n⏱️ 再生 {i + 1}/{args.repeat}: {elapsed:.2f}秒, ピークメモリ {peak / 1024 / 1024:.1f}MB (未再生 {session.remaining}件)")
+
+    print("\n" + "=" * 70)
+    print(f"平均所要時間: {sum(m[0] for m in measurements) / len(measurements):.2f}秒")
+    print(f"最大ピークメモリ: {max(m[1] for m in measurements) / 1024 / 1024:.1f}MB")
@@ -7,7 +7,7 @@ Apify Instagram API 自動呼び出しクライアント
 import os
 import time
 import requests
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from dotenv import load_dotenv
 
 
@@ -16,12 +16,15 @@ class ApifyInstagramClient:
     Apify Instagram API の自動呼び出しクライアント
     """
 
-    def __init__(self, api_token: Optional[str] = None):
+    def __init__(self, api_token: Optional[str] = None, http=None):
         """
         初期化
 
         Args:
             api_token: Apify APIトークン (省略時は環境変数から取得)
+            http: HTTP 送信に使うオブジェクト (get/post/sleep/time を持つもの、省略時は requests)
+                記録・再生には apify_cassette.CassetteSession を渡す
+                (待機・打ち切り判定は http の sleep/time を使うため、再生時は仮想時計で進む)
         """
         # 環境変数ロード
         load_dotenv()
@@ -33,6 +36,10 @@ class ApifyInstagramClient:
         self.base_url = "https://api.apify.com/v2"
         self.actor_id = "apify/instagram-scraper"
 
+        self.http = http or requests
+        self.sleep = getattr(http, "sleep", time.sleep)
+        self.clock = getattr(http, "time", time.time)
+
         print(f"✅ ApifyInstagramClient 初期化完了 (Token: {self.api_token[:20]}...)")
 
     def search_posts(
@@ -40,7 +47,8 @@ class ApifyInstagramClient:
         search_query: str,
         max_posts: int = 50,
         include_metadata: bool = True,
-        timeout: int = 120
+        timeout: int = 120,
+        deadline: Optional[float] = None
     ) -> Dict:
         """
         Instagram 投稿検索
@@ -50,9 +58,11 @@ class ApifyInstagramClient:
             max_posts: 最大取得投稿数
             include_metadata: メタデータを含むか
             timeout: タイムアウト秒数
+            deadline: 打ち切り時刻 (clock() 基準、省略時は timeout のみ)
+                到達時はジョブを中断し、取得済みの投稿だけを返す
 
         Returns:
-            Instagram データ (投稿リスト等)
+            Instagram データ (投稿リスト等、打ち切り時は partial=True)
         """
         print(f"\n🔍 Instagram 検索開始: '{search_query}' (最大{max_posts}件)")
 
@@ -66,7 +76,8 @@ class ApifyInstagramClient:
         }
 
         # Actor実行
-        run_response = self._run_actor(actor_input)
+        end_time = self._end_time(timeout, deadline)
+        run_response = self._run_actor(actor_input, end_time)
         run_id = run_response.get("data", {}).get("id")
         dataset_id = run_response.get("data", {}).get("defaultDatasetId")
 
@@ -76,24 +87,26 @@ class ApifyInstagramClient:
         print(f"  ジョブID: {run_id}")
         print(f"  データセットID: {dataset_id}")
 
-        # ジョブ完了待機
-        self._wait_for_completion(run_id, timeout)
+        # ジョブ完了待機 (期限切れ時は中断して途中結果を回収)
+        completed = self._wait_for_completion(run_id, timeout, deadline)
 
         # データ取得
-        posts = self._get_dataset_items(dataset_id)
+        posts = self._get_dataset_items(dataset_id, end_time)
 
-        print(f"✅ Instagram データ取得完了: {len(posts)}件")
+        print(f"✅ Instagram データ取得完了: {len(posts)}件" + ("" if completed else " (途中打ち切り)"))
         return {
             "posts": posts,
             "search_query": search_query,
-            "total_count": len(posts)
+            "total_count": len(posts),
+            "partial": not completed
         }
 
     def search_profiles(
         self,
         search_query: str,
         max_profiles: int = 10,
-        timeout: int = 120
+        timeout: int = 120,
+        deadline: Optional[float] = None
     ) -> Dict:
         """
         Instagram プロフィール検索
@@ -102,9 +115,10 @@ class ApifyInstagramClient:
             search_query: 検索クエリ
             max_profiles: 最大取得プロフィール数
             timeout: タイムアウト秒数
+            deadline: 打ち切り時刻 (clock() 基準、省略時は timeout のみ)
 
         Returns:
-            プロフィールデータ
+            プロフィールデータ (打ち切り時は partial=True)
         """
         print(f"\n👤 Instagram プロフィール検索: '{search_query}' (最大{max_profiles}件)")
 
@@ -115,21 +129,100 @@ class ApifyInstagramClient:
             "includeMetadata": True
         }
 
-        run_response = self._run_actor(actor_input)
+        end_time = self._end_time(timeout, deadline)
+        run_response = self._run_actor(actor_input, end_time)
         run_id = run_response.get("data", {}).get("id")
         dataset_id = run_response.get("data", {}).get("defaultDatasetId")
 
         if not run_id or not dataset_id:
             raise Exception(f"Actor実行失敗: {run_response}")
 
-        self._wait_for_completion(run_id, timeout)
-        profiles = self._get_dataset_items(dataset_id)
+        completed = self._wait_for_completion(run_id, timeout, deadline)
+        profiles = self._get_dataset_items(dataset_id, end_time)
 
-        print(f"✅ プロフィール取得完了: {len(profiles)}件")
+        print(f"✅ プロフィール取得完了: {len(profiles)}件" + ("" if completed else " (途中打ち切り)"))
         return {
             "profiles": profiles,
             "search_query": search_query,
-            "total_count": len(profiles)
+            "total_count": len(profiles),
+            "partial": not completed
+        }
+
+    def fetch_profiles(
+        self,
+        usernames: List[str],
+        batch_size: int = 50,
+        timeout: int = 120,
+        deadline: Optional[float] = None,
+        on_batch: Optional[Callable[[List[Dict]], None]] = None
+    ) -> Dict:
+        """
+        ユーザー名を指定してプロフィール詳細を取得 (バッチ単位でActor実行)
+
+        失敗したバッチは飛ばして次のバッチを取得し、取得済みのプロフィールは返す。
+
+        Args:
+            usernames: ユーザー名リスト
+            batch_size: Actor実行1回あたりのユーザー数
+            timeout: タイムアウト秒数 (Actor実行1回あたり)
+            deadline: 打ち切り時刻 (clock() 基準)
+            on_batch: バッチ取得ごとに呼ぶ関数 (例: ProfileStore.put_many で即時保存)
+
+        Returns:
+            プロフィールデータ (打ち切り時は partial=True、失敗したバッチ数は failed_batches)
+        """
+        print(f"\n👤 Instagram プロフィール詳細取得: {len(usernames)}件 ({batch_size}件/バッチ)")
+
+        profiles = []
+        partial = False
+        failed_batches = 0
+        batches = [usernames[i:i + batch_size] for i in range(0, len(usernames), batch_size)]
+
+        for batch_no, batch in enumerate(batches):
+            run_deadline = self._share_deadline(deadline, len(batches) - batch_no)
+            if run_deadline is not None and run_deadline <= self.clock():
+                partial = True
+                break
+
+            actor_input = {
+                "directUrls": [f"https://www.instagram.com/{username}/" for username in batch],
+                "resultsType": "details",
+                "resultsLimit": 1
+            }
+
+            try:
+                end_time = self._end_time(timeout, run_deadline)
+                run_response = self._run_actor(actor_input, end_time)
+                run_id = run_response.get("data", {}).get("id")
+                dataset_id = run_response.get("data", {}).get("defaultDatasetId")
+
+                if not run_id or not dataset_id:
+                    raise Exception(f"Actor実行失敗: {run_response}")
+
+                completed = self._wait_for_completion(run_id, timeout, run_deadline)
+                batch_profiles = self._get_dataset_items(dataset_id, end_time)
+            except Exception as e:
+                print(f"  ⚠️ バッチ{batch_no + 1}/{len(batches)} 取得失敗: {e}")
+                failed_batches += 1
+                continue
+
+            profiles.extend(batch_profiles)
+            if on_batch is not None:
+                on_batch(batch_profiles)
+            if not completed:
+                partial = True
+                break
+
+        print(
+            f"✅ プロフィール詳細取得完了: {len(profiles)}件"
+            + (" (途中打ち切り)" if partial else "")
+            + (f" (失敗{failed_batches}バッチ)" if failed_batches else "")
+        )
+        return {
+            "profiles": profiles,
+            "total_count": len(profiles),
+            "partial": partial,
+            "failed_batches": failed_batches
         }
 
     def search_combined(
@@ -137,7 +230,13 @@ class ApifyInstagramClient:
         keywords: List[str],
         max_posts_per_keyword: int = 20,
         max_profiles: int = 10,
-        timeout: int = 180
+        timeout: int = 180,
+        deadline: Optional[float] = None,
+        snapshot_writer=None,
+        profile_store=None,
+        profile_batch_size: int = 50,
+        max_keywords: int = 5,
+        keyword_tracker=None
     ) -> Dict:
         """
         複数キーワードで投稿とプロフィールを統合検索
@@ -146,39 +245,160 @@ class ApifyInstagramClient:
             keywords: 検索キーワードリスト
             max_posts_per_keyword: キーワードあたりの最大投稿数
             max_profiles: 最大プロフィール数
-            timeout: タイムアウト秒数
+            timeout: タイムアウト秒数 (Actor実行1回あたり)
+            deadline: 全体の打ち切り時刻 (clock() 基準)
+                残り時間を未実行のActor実行数で均等に配分する
+            snapshot_writer: 取得結果を逐次保存する SnapshotWriter (省略可)
+            profile_store: プロフィールのローカルストア ProfileStore (省略可)
+                指定時は全キーワードの投稿者から最大 max_profiles 件/キーワードを補完し、
+                期限切れ・未取得のアカウントだけをバッチ取得する
+            profile_batch_size: プロフィール詳細取得の1バッチあたりのユーザー数
+            max_keywords: 投稿検索するキーワード数 (Actor実行回数)
+            keyword_tracker: キーワード収量の記録 KeywordYieldTracker (省略可)
+                指定時は実績から期待ユニーク投稿数の大きいキーワードを選び、収量を記録する
 
         Returns:
-            統合Instagram データ
+            統合Instagram データ (keywords は投稿検索したキーワード、candidate_keywords は候補全体、
+            coverage に取得状況を記録)
         """
         print(f"\n🔎 統合検索開始: {len(keywords)}キーワード")
 
         all_posts = []
         all_profiles = []
+        posts_by_keyword = {}
+
+        if keyword_tracker is not None:
+            post_keywords = keyword_tracker.plan(keywords, max_keywords)
+            print(f"  取得計画: {post_keywords}")
+        else:
+            post_keywords = keywords[:max_keywords]
+        seen_post_ids = set()
+        runs_left = len(post_keywords) + (1 if keywords else 0) + (1 if profile_store is not None else 0)
+        coverage = {
+            "keywords_requested": list(post_keywords),
+            "keywords_completed": [],
+            "keywords_partial": [],
+            "keywords_skipped": [],
+            "profiles_status": "skipped" if keywords else "none",
+            "profiles_from_store": 0,
+            "profiles_fetched": 0,
+            "profiles_enrichment_partial": False,
+            "profiles_failed_batches": 0,
+            "keyword_yields": [],
+            "budget_exhausted": False
+        }
 
         # キーワードごとに投稿検索
-        for keyword in keywords[:5]:  # 最大5キーワード
+        for keyword in post_keywords:
+            run_deadline = self._share_deadline(deadline, runs_left)
+            runs_left -= 1
+            if run_deadline is not None and run_deadline <= self.clock():
+                coverage["keywords_skipped"].append(keyword)
+                coverage["budget_exhausted"] = True
+                continue
             try:
                 result = self.search_posts(
                     keyword,
                     max_posts=max_posts_per_keyword,
-                    timeout=timeout
+                    timeout=timeout,
+                    deadline=run_deadline
                 )
                 all_posts.extend(result.get("posts", []))
+                posts_by_keyword[keyword] = result.get("posts", [])
+                if keyword_tracker is not None:
+                    coverage["keyword_yields"].append(
+                        keyword_tracker.record(
+                            keyword, result.get("posts", []), seen_post_ids, partial=result.get("partial", False)
+                        )
+                    )
+                if snapshot_writer is not None:
+                    snapshot_writer.write_posts(keyword, result.get("posts", []))
+                if result.get("partial"):
+                    coverage["keywords_partial"].append(keyword)
+                else:
+                    coverage["keywords_completed"].append(keyword)
             except Exception as e:
                 print(f"  ⚠️ キーワード '{keyword}' で検索失敗: {e}")
-
-        # 最初のキーワードでプロフィール検索
-        if keywords:
-            try:
-                result = self.search_profiles(
-                    keywords[0],
-                    max_profiles=max_profiles,
-                    timeout=timeout
-                )
-                all_profiles = result.get("profiles", [])
-            except Exception as e:
-                print(f"  ⚠️ プロフィール検索失敗: {e}")
+                coverage["keywords_skipped"].append(keyword)
+
+        # 最初のキーワードでプロフィール検索 (ストアに鮮度期限内の結果があれば再利用)
+        cached_usernames = profile_store.get_keyword(keywords[0]) if profile_store and keywords else None
+        if cached_usernames is not None:
+            fresh, stale = profile_store.get_many(cached_usernames)
+            coverage["profiles_status"] = "completed"
+            coverage["profiles_from_store"] += len(fresh)
+            print(f"  ⚡ プロフィール検索 '{keywords[0]}': ストアから{len(fresh)}件、期限切れ{len(stale)}件")
+
+            # 期限切れのアカウントだけ取得し直す (キーワード検索はやり直さない)
+            run_deadline = self._share_deadline(deadline, runs_left)
+            runs_left -= 1
+            if stale and run_deadline is not None and run_deadline <= self.clock():
+                coverage["profiles_status"] = "partial"
+            elif stale:
+                try:
+                    result = self.fetch_profiles(
+                        stale,
+                        batch_size=profile_batch_size,
+                        timeout=timeout,
+                        deadline=run_deadline,
+                        on_batch=profile_store.put_many
+                    )
+                    fetched = result.get("profiles", [])
+                    coverage["profiles_fetched"] += len(fetched)
+                    coverage["profiles_failed_batches"] += result.get("failed_batches", 0)
+                    if result.get("partial"):
+                        coverage["profiles_status"] = "partial"
+                    for profile in fetched:
+                        fresh[(profile.get("username") or "").lower()] = profile
+                except Exception as e:
+                    print(f"  ⚠️ プロフィール詳細取得失敗: {e}")
+
+            all_profiles = [fresh[username] for username in cached_usernames if username in fresh]
+
+        if keywords and coverage["profiles_status"] == "skipped":
+            run_deadline = self._share_deadline(deadline, runs_left)
+            runs_left -= 1
+            if run_deadline is not None and run_deadline <= self.clock():
+                coverage["budget_exhausted"] = True
+            else:
+                try:
+                    result = self.search_profiles(
+                        keywords[0],
+                        max_profiles=max_profiles,
+                        timeout=timeout,
+                        deadline=run_deadline
+                    )
+                    all_profiles = result.get("profiles", [])
+                    if profile_store is not None and not result.get("partial"):
+                        profile_store.put_keyword(keywords[0], all_profiles)
+                    coverage["profiles_status"] = "partial" if result.get("partial") else "completed"
+                    coverage["profiles_fetched"] += len(all_profiles)
+                except Exception as e:
+                    print(f"  ⚠️ プロフィール検索失敗: {e}")
+
+        # 全キーワードの投稿者でプロフィール補完 (ストアにないものだけ取得)
+        if profile_store is not None and posts_by_keyword:
+            enriched = self._enrich_profiles(
+                posts_by_keyword,
+                all_profiles,
+                profile_store,
+                max_profiles_per_keyword=max_profiles,
+                batch_size=profile_batch_size,
+                timeout=timeout,
+                deadline=self._share_deadline(deadline, runs_left),
+                coverage=coverage
+            )
+            all_profiles = all_profiles + enriched
+
+        if snapshot_writer is not None and all_profiles:
+            snapshot_writer.write_profiles(keywords[0], all_profiles)
+
+        if (
+            coverage["keywords_partial"]
+            or coverage["profiles_status"] == "partial"
+            or coverage["profiles_enrichment_partial"]
+        ):
+            coverage["budget_exhausted"] = True
 
         # 重複削除
         unique_posts = self._deduplicate_posts(all_posts)
@@ -189,12 +409,73 @@ class ApifyInstagramClient:
         return {
             "posts": unique_posts,
             "profiles": unique_profiles,
-            "keywords": keywords,
+            "keywords": list(post_keywords),
+            "candidate_keywords": keywords,
             "total_posts": len(unique_posts),
-            "total_profiles": len(unique_profiles)
+            "total_profiles": len(unique_profiles),
+            "coverage": coverage
         }
 
-    def _run_actor(self, actor_input: Dict) -> Dict:
+    def _enrich_profiles(
+        self,
+        posts_by_keyword: Dict[str, List[Dict]],
+        known_profiles: List[Dict],
+        profile_store,
+        max_profiles_per_keyword: int,
+        batch_size: int,
+        timeout: int,
+        deadline: Optional[float],
+        coverage: Dict
+    ) -> List[Dict]:
+        """投稿者プロフィールの補完 (ストア優先、期限切れ・未取得分のみバッチ取得)"""
+        known = {(p.get("username") or "").lower() for p in known_profiles}
+
+        # キーワードごとの投稿者 (投稿数の多い順) を順番に取り出し、全キーワードを均等にカバー
+        owner_lists = []
+        for posts in posts_by_keyword.values():
+            counts: Dict[str, int] = {}
+            for post in posts:
+                owner = (post.get("ownerUsername") or "").lower()
+                if owner and owner not in known:
+                    counts[owner] = counts.get(owner, 0) + 1
+            owner_lists.append(sorted(counts, key=counts.get, reverse=True)[:max_profiles_per_keyword])
+
+        candidates = []
+        for rank in range(max((len(owners) for owners in owner_lists), default=0)):
+            for owners in owner_lists:
+                if rank < len(owners) and owners[rank] not in candidates:
+                    candidates.append(owners[rank])
+
+        if not candidates:
+            return []
+
+        fresh, stale = profile_store.get_many(candidates)
+        coverage["profiles_from_store"] += len(fresh)
+        print(f"\n👥 投稿者プロフィール補完: {len(candidates)}件 (ストア{len(fresh)}件、取得{len(stale)}件)")
+
+        if stale:
+            try:
+                # バッチごとにストアへ保存 (後続バッチが失敗しても取得済み分は残る)
+                result = self.fetch_profiles(
+                    stale,
+                    batch_size=batch_size,
+                    timeout=timeout,
+                    deadline=deadline,
+                    on_batch=profile_store.put_many
+                )
+                fetched = result.get("profiles", [])
+                coverage["profiles_fetched"] += len(fetched)
+                if result.get("partial"):
+                    coverage["profiles_enrichment_partial"] = True
+                coverage["profiles_failed_batches"] += result.get("failed_batches", 0)
+                for profile in fetched:
+                    fresh[(profile.get("username") or "").lower()] = profile
+            except Exception as e:
+                print(f"  ⚠️ プロフィール詳細取得失敗: {e}")
+
+        return [fresh[username] for username in candidates if username in fresh]
+
+    def _run_actor(self, actor_input: Dict, end_time: float) -> Dict:
         """Actor実行"""
         # Actor IDの / を ~ に変換 (Apify API仕様)
         actor_id_formatted = self.actor_id.replace("/", "~")
@@ -204,38 +485,84 @@ class ApifyInstagramClient:
             "Content-Type": "application/json"
         }
 
-        response = requests.post(url, json=actor_input, headers=headers)
+        response = self.http.post(url, json=actor_input, headers=headers, timeout=self._request_timeout(end_time))
         response.raise_for_status()
         return response.json()
 
-    def _wait_for_completion(self, run_id: str, timeout: int):
-        """ジョブ完了待機"""
+    def _wait_for_completion(
+        self,
+        run_id: str,
+        timeout: int,
+        deadline: Optional[float] = None
+    ) -> bool:
+        """
+        ジョブ完了待機
+
+        deadline に到達した場合はジョブを中断し False を返す
+        (データセットには中断までに取得された分が残る)
+        """
         url = f"{self.base_url}/actor-runs/{run_id}"
         headers = {"Authorization": f"Bearer {self.api_token}"}
 
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            response = requests.get(url, headers=headers)
+        start_time = self.clock()
+        end_time = start_time + timeout
+        if deadline is not None:
+            end_time = min(end_time, deadline)
+
+        while self.clock() < end_time:
+            response = self.http.get(url, headers=headers, timeout=self._request_timeout(end_time))
             response.raise_for_status()
             status = response.json().get("data", {}).get("status")
 
             if status == "SUCCEEDED":
                 print(f"  ✅ ジョブ完了")
-                return
+                return True
             elif status in ["FAILED", "ABORTED", "TIMED-OUT"]:
                 raise Exception(f"ジョブ失敗: {status}")
 
             print(f"  ⏳ 待機中... ({status})")
-            time.sleep(10)
+            self.sleep(max(0.0, min(10, end_time - self.clock())))
+
+        if deadline is not None and deadline <= start_time + timeout:
+            print(f"  ⏱️ 時間予算切れ: ジョブを中断し途中結果を回収します")
+            self._abort_run(run_id, end_time)
+            return False
 
         raise TimeoutError(f"ジョブタイムアウト ({timeout}秒)")
 
-    def _get_dataset_items(self, dataset_id: str) -> List[Dict]:
+    def _abort_run(self, run_id: str, end_time: float):
+        """ジョブ中断 (失敗しても途中結果の回収は続行)"""
+        url = f"{self.base_url}/actor-runs/{run_id}/abort"
+        headers = {"Authorization": f"Bearer {self.api_token}"}
+
+        try:
+            response = self.http.post(url, headers=headers, timeout=self._request_timeout(end_time))
+            response.raise_for_status()
+        except Exception as e:
+            print(f"  ⚠️ ジョブ中断失敗: {e}")
+
+    def _end_time(self, timeout: int, deadline: Optional[float]) -> float:
+        """Actor実行1回の打ち切り時刻 (timeout と deadline の早い方)"""
+        end_time = self.clock() + timeout
+        return end_time if deadline is None else min(end_time, deadline)
+
+    def _request_timeout(self, end_time: float) -> float:
+        """HTTP リクエスト1回のタイムアウト秒数 (打ち切り時刻までの残り、最低1秒)"""
+        return max(1, end_time - self.clock())
+
+    def _share_deadline(self, deadline: Optional[float], runs_left: int) -> Optional[float]:
+        """残り時間を未実行のActor実行数で均等配分した打ち切り時刻"""
+        if deadline is None:
+            return None
+        now = self.clock()
+        return now + (deadline - now) / max(runs_left, 1)
+
+    def _get_dataset_items(self, dataset_id: str, end_time: float) -> List[Dict]:
         """データセットアイテム取得"""
         url = f"{self.base_url}/datasets/{dataset_id}/items"
         headers = {"Authorization": f"Bearer {self.api_token}"}
 
-        response = requests.get(url, headers=headers)
+        response = self.http.get(url, headers=headers, timeout=self._request_timeout(end_time))
         response.raise_for_status()
         return response.json()
 
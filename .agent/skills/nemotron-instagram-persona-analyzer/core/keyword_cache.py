@@ -0,0 +1,184 @@
+"""
+Instagram キーワード生成のキャッシュ
+
+- キーワード生成器をバイナリ (pickle) で保存し、2回目以降は JSON 解析を省略
+  (生成器インスタンスをそのまま保存するのみで、属性の索引等は持たない)
+- キーワード生成に使われるペルソナ属性の値をキーに generate_keywords の結果をメモ化 (LRU)
+"""
+
+import hashlib
+import inspect
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# キーワード生成に使われるペルソナ属性 (キャッシュキー)
+KEYWORD_ATTRIBUTES = (
+    "occupation",
+    "career_goals_and_ambitions",
+    "hobbies_and_interests",
+    "skills_and_expertise",
+    "age",
+    "prefecture",
+)
+
+# コンパイル済みファイルの形式バージョン (形式変更時に更新)
+COMPILED_FORMAT_VERSION = 2
+
+
+def factory_fingerprint(factory: Callable) -> str:
+    """
+    生成器クラスのソースのハッシュ (クラス定義が変わったらコンパイル済みファイルを破棄)
+
+    ソースを取得できない場合はモジュール名・クラス名のみ
+    """
+    name = f"{getattr(factory, '__module__', '')}.{getattr(factory, '__qualname__', repr(factory))}"
+    try:
+        source = Path(inspect.getfile(factory)).read_bytes()
+    except (TypeError, OSError):
+        return name
+    return f"{name}:{hashlib.sha1(source).hexdigest()}"
+
+
+def load_compiled_generator(
+    factory: Callable[[str], object],
+    mapping_file: str,
+    compiled_file: Optional[str] = None
+):
+    """
+    キーワード生成器をコンパイル済みファイルからロード
+
+    マッピングファイルの更新日時・サイズと生成器クラスのソースが一致する場合は
+    pickle から復元し、それ以外は factory で生成してコンパイル済みファイルを書き出す。
+
+    Args:
+        factory: 生成器クラス (例: InstagramKeywordGenerator)
+        mapping_file: キーワードマッピングファイル (JSON)
+        compiled_file: コンパイル済みファイル (省略時は mapping_file と同じ場所の .pickle)
+
+    Returns:
+        キーワード生成器
+    """
+    source = Path(mapping_file)
+    target = Path(compiled_file) if compiled_file else source.with_suffix(".compiled.pickle")
+
+    try:
+        stat = source.stat()
+        signature = (COMPILED_FORMAT_VERSION, factory_fingerprint(factory), stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        # マッピングファイルなし → 生成器側のデフォルト値処理に任せる
+        return factory(str(mapping_file))
+
+    if target.exists():
+        try:
+            with open(target, "rb") as f:
+                stored_signature, generator = pickle.load(f)
+            if stored_signature == signature:
+                print(f"⚡ キーワードマッピング: コンパイル済みファイルを使用 ({target.name})")
+                return generator
+        except Exception as e:
+            print(f"  ⚠️ コンパイル済みファイル読み込み失敗 (再生成します): {e}")
+
+    generator = factory(str(mapping_file))
+    try:
+        with open(target, "wb") as f:
+            pickle.dump((signature, generator), f, protocol=pickle.HIGHEST_PROTOCOL)
+    except Exception as e:
+        print(f"  ⚠️ コンパイル済みファイル保存失敗: {e}")
+
+    return generator
+
+
+class CachedKeywordGenerator:
+    """
+    generate_keywords の結果をメモ化するラッパー
+
+    キャッシュキーは生成器が読むペルソナ属性 (attributes) の値そのもの (正規化しない)。
+    uuid・氏名が異なっても職業・目標・趣味等の組み合わせが同じペルソナはヒットする。
+    attributes を省略した場合はペルソナの全フィールドをキーにする。
+    キャッシュは maxsize 件まで保持し、超過時は最も古く使われたものから削除する。
+    """
+
+    def __init__(
+        self,
+        generator,
+        maxsize: int = 4096,
+        attributes: Optional[Tuple[str, ...]] = None
+    ):
+        """
+        初期化
+
+        Args:
+            generator: キーワード生成器 (generate_keywords を持つオブジェクト)
+            maxsize: 最大キャッシュ件数
+            attributes: キャッシュキーに使うペルソナ属性 (生成器が読むフィールドすべて、
+                例: KEYWORD_ATTRIBUTES、省略時はペルソナの全フィールド)
+        """
+        self.generator = generator
+        self.maxsize = maxsize
+        self.attributes = attributes
+        self._cache: "OrderedDict[Tuple, List[str]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def generate_keywords(self, persona: Dict, max_keywords: int = 10) -> List[str]:
+        """
+        キーワード生成 (キャッシュ経由)
+
+        Args:
+            persona: Nemotron ペルソナ
+            max_keywords: 最大キーワード数
+
+        Returns:
+            キーワードリスト
+        """
+        key = self._make_key(persona, max_keywords)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.hits += 1
+            return list(cached)
+
+        self.misses += 1
+        keywords = self.generator.generate_keywords(persona, max_keywords=max_keywords)
+        self._cache[key] = list(keywords)
+        if len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+        return list(keywords)
+
+    def stats(self) -> Dict:
+        """キャッシュ統計 (ヒット数・ミス数・ヒット率・件数)"""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": len(self._cache),
+            "maxsize": self.maxsize
+        }
+
+    def cache_clear(self):
+        """キャッシュと統計のリセット"""
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def _make_key(self, persona: Dict, max_keywords: int) -> Tuple:
+        """ペルソナ属性の値そのものからキャッシュキー生成"""
+        attributes = self.attributes if self.attributes is not None else sorted(persona)
+        return (max_keywords,) + tuple((attr, _freeze(persona.get(attr))) for attr in attributes)
+
+
+def _freeze(value) -> object:
+    """属性値をハッシュ可能な形に変換 (値は変更しない)"""
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, set):
+        return tuple(sorted(_freeze(v) for v in value))
+    return value
@@ -0,0 +1,254 @@
+"""
+キーワード収量の記録と取得計画
+
+キーワードごとの取得実績 (ユニーク投稿数・重複率・悩み投稿数) と、
+取得したキャプションのハッシュタグ共起を SQLite に蓄積する。
+次回以降は実績と共起から「既に選んだキーワードと重ならない投稿が
+どれだけ得られるか」を見積もり、取得回数の上限内で貪欲に選択する。
+"""
+
+import math
+import re
+import sqlite3
+import time
+import unicodedata
+from itertools import combinations
+from pathlib import Path
+from typing import Dict, Iterable, List, Set
+
+
+# 悩み・課題を含む投稿の判定キーワード
+PAIN_POINT_KEYWORDS = (
+    "悩", "不安", "心配", "困", "面倒", "めんどう", "大変", "難しい", "わからない", "分からない",
+    "失敗", "後悔", "怖い", "辛い", "つらい", "ストレス", "疲れ", "限界", "ミス",
+)
+
+# 試行回数の少ないキーワードへの上乗せ (未試行で +20%、試行回数の平方根に反比例して減衰)
+EXPLORATION_BONUS = 0.2
+
+_HASHTAG = re.compile(r"#([^\s#]+)")
+
+
+def normalize_tag(keyword: str) -> str:
+    """キーワード・ハッシュタグの正規化 (# 除去・NFKC・小文字)"""
+    return unicodedata.normalize("NFKC", keyword).lstrip("#").strip().lower()
+
+
+def post_hashtags(post: Dict) -> Set[str]:
+    """投稿のハッシュタグ (正規化済み)"""
+    tags = post.get("hashtags") or _HASHTAG.findall(post.get("caption") or "")
+    return {normalize_tag(tag) for tag in tags if tag}
+
+
+def is_pain_point_post(post: Dict) -> bool:
+    """悩み・課題を含む投稿か"""
+    caption = post.get("caption") or ""
+    return any(word in caption for word in PAIN_POINT_KEYWORDS)
+
+
+class KeywordYieldTracker:
+    """
+    キーワード収量・ハッシュタグ共起の記録と取得計画 (SQLite)
+    """
+
+    def __init__(self, db_path: str):
+        """
+        初期化
+
+        Args:
+            db_path: 記録ファイル
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS keyword_yield (
+                keyword TEXT PRIMARY KEY,
+                runs INTEGER NOT NULL,
+                posts INTEGER NOT NULL,
+                unique_posts INTEGER NOT NULL,
+                pain_posts INTEGER NOT NULL,
+                last_run_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS hashtag_count (
+                tag TEXT PRIMARY KEY,
+                posts INTEGER NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS hashtag_cooccurrence (
+                tag_a TEXT NOT NULL,
+                tag_b TEXT NOT NULL,
+                posts INTEGER NOT NULL,
+                PRIMARY KEY (tag_a, tag_b)
+            );
+            """
+        )
+        self._conn.commit()
+
+    def record(self, keyword: str, posts: List[Dict], seen_ids: Set[str], partial: bool = False) -> Dict:
+        """
+        1キーワード分の取得結果を記録
+
+        時間予算で打ち切った取得 (partial=True) は収量が過小になるため実績 (試行回数・平均) に
+        含めず、取得済みIDとハッシュタグ共起だけを更新する。
+
+        Args:
+            keyword: 検索キーワード
+            posts: 取得投稿
+            seen_ids: 同じ実行で取得済みの投稿ID (更新される)
+            partial: 打ち切った取得か
+
+        Returns:
+            今回の収量 (投稿数・ユニーク投稿数・重複率・悩み投稿数・打ち切りの有無)
+        """
+        unique_posts = 0
+        pain_posts = 0
+        new_posts = []
+        for post in posts:
+            post_id = post.get("id") or post.get("shortCode")
+            if not post_id or post_id in seen_ids:
+                continue
+            seen_ids.add(post_id)
+            unique_posts += 1
+            new_posts.append(post)
+            if is_pain_point_post(post):
+                pain_posts += 1
+
+        if not partial:
+            self._conn.execute(
+                """
+                INSERT INTO keyword_yield VALUES (?, 1, ?, ?, ?, ?)
+                ON CONFLICT(keyword) DO UPDATE SET
+                    runs = runs + 1,
+                    posts = posts + excluded.posts,
+                    unique_posts = unique_posts + excluded.unique_posts,
+                    pain_posts = pain_posts + excluded.pain_posts,
+                    last_run_at = excluded.last_run_at
+                """,
+                (normalize_tag(keyword), len(posts), unique_posts, pain_posts, time.time())
+            )
+        self._record_cooccurrence(post_hashtags(post) for post in new_posts)
+        self._conn.commit()
+
+        return {
+            "keyword": keyword,
+            "posts": len(posts),
+            "unique_posts": unique_posts,
+            "duplicate_ratio": 1 - unique_posts / len(posts) if posts else 0.0,
+            "pain_posts": pain_posts,
+            "partial": partial
+        }
+
+    def keyword_stats(self, keyword: str) -> Dict:
+        """キーワードの累計収量 (実績なしの場合は runs=0)"""
+        row = self._conn.execute(
+            "SELECT runs, posts, unique_posts, pain_posts FROM keyword_yield WHERE keyword = ?",
+            (normalize_tag(keyword),)
+        ).fetchone()
+        runs, posts, unique_posts, pain_posts = row or (0, 0, 0, 0)
+        return {
+            "keyword": keyword,
+            "runs": runs,
+            "avg_unique_posts": unique_posts / runs if runs else 0.0,
+            "duplicate_ratio": 1 - unique_posts / posts if posts else 0.0,
+            "pain_ratio": pain_posts / unique_posts if unique_posts else 0.0
+        }
+
+    def plan(self, candidates: List[str], budget: int) -> List[str]:
+        """
+        取得キーワードの選択
+
+        期待ユニーク投稿数 = 平均ユニーク投稿数 x (1 + 悩み投稿率) x (1 - 選択済みとの重複率)
+        を貪欲に最大化する。実績のないキーワードは実績ありの平均値で見積もり、
+        試行回数の少ないキーワードほど EXPLORATION_BONUS を上乗せする (未試行を順に試す)。
+        重複率は選択済みキーワードとのハッシュタグ共起の最大値で近似する。
+
+        Args:
+            candidates: 候補キーワード (生成順)
+            budget: 取得するキーワード数 (Actor実行回数)
+
+        Returns:
+            選択したキーワード (選択順)
+        """
+        candidates = list(dict.fromkeys(candidates))
+        if budget >= len(candidates):
+            return candidates
+
+        stats = {keyword: self.keyword_stats(keyword) for keyword in candidates}
+        tried = [s for s in stats.values() if s["runs"]]
+        if not tried:
+            return candidates[:budget]
+
+        prior = sum(s["avg_unique_posts"] * (1 + s["pain_ratio"]) for s in tried) / len(tried)
+        expected = {
+            keyword: (s["avg_unique_posts"] * (1 + s["pain_ratio"]) if s["runs"] else prior)
+            * (1 + EXPLORATION_BONUS / math.sqrt(s["runs"] + 1))
+            for keyword, s in stats.items()
+        }
+
+        selected: List[str] = []
+        overlap = {keyword: 0.0 for keyword in candidates}
+        while len(selected) < budget:
+            # 同点の場合は生成順を優先
+            best = max(
+                (keyword for keyword in candidates if keyword not in selected),
+                key=lambda keyword: expected[keyword] * (1 - overlap[keyword])
+            )
+            selected.append(best)
+            for keyword in candidates:
+                if keyword not in selected:
+                    overlap[keyword] = max(overlap[keyword], self.cooccurrence_ratio(keyword, best))
+
+        return selected
+
+    def cooccurrence_ratio(self, keyword: str, other: str) -> float:
+        """keyword のハッシュタグを持つ投稿のうち other も持つ割合"""
+        tag, other_tag = normalize_tag(keyword), normalize_tag(other)
+        row = self._conn.execute("SELECT posts FROM hashtag_count WHERE tag = ?", (tag,)).fetchone()
+        if not row or not row[0]:
+            return 0.0
+
+        tag_a, tag_b = sorted((tag, other_tag))
+        pair = self._conn.execute(
+            "SELECT posts FROM hashtag_cooccurrence WHERE tag_a = ? AND tag_b = ?",
+            (tag_a, tag_b)
+        ).fetchone()
+        return min(1.0, (pair[0] if pair else 0) / row[0])
+
+    def related_hashtags(self, keyword: str, limit: int = 10) -> List[str]:
+        """共起回数の多いハッシュタグ (キーワード候補の追加用)"""
+        tag = normalize_tag(keyword)
+        rows = self._conn.execute(
+            """
+            SELECT CASE WHEN tag_a = ? THEN tag_b ELSE tag_a END AS other, posts
+            FROM hashtag_cooccurrence
+            WHERE tag_a = ? OR tag_b = ?
+            ORDER BY posts DESC
+            LIMIT ?
+            """,
+            (tag, tag, tag, limit)
+        ).fetchall()
+        return [f"#{other}" for other, _ in rows]
+
+    def close(self):
+        """接続クローズ"""
+        self._conn.close()
+
+    def _record_cooccurrence(self, tag_sets: Iterable[Set[str]]):
+        """ハッシュタグ出現数・共起数の加算"""
+        for tags in tag_sets:
+            self._conn.executemany(
+                """
+                INSERT INTO hashtag_count VALUES (?, 1)
+                ON CONFLICT(tag) DO UPDATE SET posts = posts + 1
+                """,
+                [(tag,) for tag in tags]
+            )
+            self._conn.executemany(
+                """
+                INSERT INTO hashtag_cooccurrence VALUES (?, ?, 1)
+                ON CONFLICT(tag_a, tag_b) DO UPDATE SET posts = posts + 1
+                """,
+                list(combinations(sorted(tags), 2))
+            )
@@ -6,6 +6,8 @@ Nemotron-Instagram 統合パイプライン
 
 import sys
 import os
+import time
+import inspect
 from pathlib import Path
 from typing import Dict, List, Optional
 
@@ -21,6 +23,15 @@ from lib.nemotron_persona_selector import NemotronPersonaSelector
 from lib.instagram_keyword_generator import InstagramKeywordGenerator
 from lib.persona_integrator import PersonaIntegrator
 from apify_client import ApifyInstagramClient
+from apify_cassette import CassetteSession
+from keyword_cache import KEYWORD_ATTRIBUTES, CachedKeywordGenerator, load_compiled_generator
+from keyword_planner import KeywordYieldTracker
+from parallel_integration import integrate_parallel
+from persona_index import PersonaIndex
+from profile_store import ProfileStore
+from report_writer import abort_report_sinks, open_report_sinks
+from selection_cache import SelectionCache
+from snapshot_store import SnapshotReader, SnapshotWriter, check_snapshot_dir
 
 
 class NemotronInstagramPipeline:
@@ -34,10 +45,23 @@ class NemotronInstagramPipeline:
     5. Markdown レポート生成
     """
 
+    # 時間予算のうちデータ統合・レポート生成用に確保する割合
+    POST_FETCH_RESERVE_RATIO = 0.1
+
     def __init__(
         self,
         apify_token: Optional[str] = None,
-        keyword_mapping_file: Optional[str] = None
+        keyword_mapping_file: Optional[str] = None,
+        keyword_cache_size: int = 4096,
+        persona_index_dir: Optional[str] = None,
+        shortlist_size: int = 2000,
+        selection_cache_path: Optional[str] = None,
+        selection_cache_size: int = 1000,
+        persona_store_version: Optional[str] = None,
+        profile_store_path: Optional[str] = None,
+        profile_max_age_hours: float = 168,
+        keyword_stats_path: Optional[str] = None,
+        apify_http=None
     ):
         """
         初期化
@@ -45,6 +69,21 @@ class NemotronInstagramPipeline:
         Args:
             apify_token: Apify APIトークン (省略時は環境変数)
             keyword_mapping_file: キーワードマッピングファイル
+            keyword_cache_size: キーワード生成結果の最大キャッシュ件数
+            persona_index_dir: ペルソナ索引 (persona_index.py で構築) のディレクトリ
+                指定時は索引の上位候補のみをルールベーススコアで順位付けする
+                (select_personas の candidates 引数、なければ選定器の dataset を候補に差し替えて渡す)
+            shortlist_size: 索引から取得する候補数
+            selection_cache_path: ペルソナ選定結果のキャッシュファイル (省略時はキャッシュなし)
+            selection_cache_size: 選定キャッシュの最大件数
+            persona_store_version: ペルソナデータのバージョン (変更時は選定キャッシュを破棄)
+                省略時はデータセットのフィンガープリント (判定できない場合は ValueError)
+            profile_store_path: Instagram プロフィールのローカルストア (省略時は毎回取得)
+                指定時は全キーワードの投稿者プロフィールを補完し、期限切れ・未取得分のみ取得する
+            profile_max_age_hours: ストアのプロフィールを再利用する鮮度期限 (時間)
+            keyword_stats_path: キーワード収量の記録ファイル (省略時は生成順に取得)
+                指定時は収量実績とハッシュタグ共起から取得キーワードを選択する
+            apify_http: Apify API の HTTP 送信オブジェクト (apify_cassette.CassetteSession で記録・再生)
         """
         print("=" * 70)
         print("🚀 Nemotron-Instagram パイプライン初期化中...")
@@ -53,12 +92,61 @@ class NemotronInstagramPipeline:
         # モジュール初期化
         self.nemotron_selector = NemotronPersonaSelector()
 
+        # ペルソナ索引 (任意)
+        self.persona_index = None
+        self.persona_dataset = None
+        self.shortlist_size = shortlist_size
+        if persona_index_dir:
+            # 索引の候補は candidates 引数、または選定器のデータセットの差し替えで渡す
+            supports_candidates = "candidates" in inspect.signature(
+                self.nemotron_selector.select_personas
+            ).parameters
+            if not supports_candidates and not hasattr(self.nemotron_selector, "dataset"):
+                raise ValueError(
+                    "NemotronPersonaSelector に候補を渡せないため (candidates 引数・dataset 属性なし)、"
+                    "persona_index_dir は使用できません"
+                )
+
+            self.persona_index = PersonaIndex(persona_index_dir)
+            # 選定器がロード済みのデータセットを再利用 (二重ロードを避ける)
+            self.persona_dataset = getattr(self.nemotron_selector, "dataset", None)
+            if self.persona_dataset is None:
+                from datasets import load_dataset
+
+                self.persona_dataset = load_dataset("nvidia/Nemotron-Personas-Japan", split="train")
+            print(f"✅ ペルソナ索引ロード完了: {self.persona_index.rows}件")
+
+        # 選定結果キャッシュ (任意)
+        self.selection_cache = None
+        if selection_cache_path:
+            if persona_store_version is None:
+                persona_store_version = self._persona_store_fingerprint()
+            if persona_store_version is None:
+                raise ValueError(
+                    "ペルソナデータのバージョンを判定できません。"
+                    "selection_cache_path を使う場合は persona_store_version を指定してください"
+                )
+            self.selection_cache = SelectionCache(
+                selection_cache_path,
+                store_version=persona_store_version,
+                max_entries=selection_cache_size
+            )
+
         # キーワード生成器 (デフォルトパス使用)
         if keyword_mapping_file is None:
             keyword_mapping_file = project_root / "config" / "keyword_mapping.json"
-        self.keyword_generator = InstagramKeywordGenerator(str(keyword_mapping_file))
+        self.keyword_generator = CachedKeywordGenerator(
+            load_compiled_generator(InstagramKeywordGenerator, str(keyword_mapping_file)),
+            maxsize=keyword_cache_size,
+            attributes=KEYWORD_ATTRIBUTES
+        )
 
-        self.apify_client = ApifyInstagramClient(apify_token)
+        self.apify_client = ApifyInstagramClient(apify_token, http=apify_http)
+        self.profile_store = (
+            ProfileStore(profile_store_path, max_age_hours=profile_max_age_hours)
+            if profile_store_path else None
+        )
+        self.keyword_tracker = KeywordYieldTracker(keyword_stats_path) if keyword_stats_path else None
         self.integrator = PersonaIntegrator()
 
         print("✅ パイプライン初期化完了\n")
@@ -69,7 +157,12 @@ class NemotronInstagramPipeline:
         max_personas: int = 3,
         max_posts_per_keyword: int = 20,
         max_profiles: int = 10,
-        min_trust_score: int = 60
+        min_trust_score: int = 60,
+        time_budget: Optional[float] = None,
+        integration_workers: int = 1,
+        snapshot_dir: Optional[str] = None,
+        output_paths: Optional[List[str]] = None,
+        scrape_budget: int = 5
     ) -> Dict:
         """
         全自動パイプライン実行
@@ -80,20 +173,35 @@ class NemotronInstagramPipeline:
             max_posts_per_keyword: キーワードあたりの最大投稿数
             max_profiles: 最大プロフィール数
             min_trust_score: 最低信頼性スコア (この値以上のペルソナのみ採用)
+            time_budget: 全体の時間予算 (秒、省略時は無制限)
+                超過時は未完了の取得を中断し、取得済みデータで統合・レポート生成する
+            integration_workers: データ統合のワーカープロセス数 (1 は逐次実行)
+            snapshot_dir: Instagram データの保存先 (指定時は取得しながら保存し、
+                戻り値の instagram_data は生データを含まない要約になる)
+            output_paths: レポート出力先 (拡張子 .md / .jsonl / .csv で形式を選択)
+                指定時はペルソナを統合するたびに書き出し、markdown_report は None になる
+            scrape_budget: 投稿検索するキーワード数 (Actor実行回数)
 
         Returns:
             統合結果 (ペルソナリスト、Markdownレポート等)
+
+        Raises:
+            FileExistsError: snapshot_dir に既存のスナップショットがある場合 (ステップ1の前に確認)
         """
+        # 既存のスナップショットへの上書きはペルソナ選定・取得の前に検出
+        if snapshot_dir:
+            check_snapshot_dir(snapshot_dir)
+
+        # 打ち切り判定は Apify クライアントの時計 (再生時は記録に沿った仮想時計)
+        deadline = self.apify_client.clock() + time_budget if time_budget is not None else None
+
         print("=" * 70)
         print(f"📊 ターゲット: '{target_description}'")
         print("=" * 70)
 
         # ステップ1: Nemotron ペルソナ選定
         print("\n【ステップ1/5】Nemotron ペルソナ選定")
-        personas = self.nemotron_selector.select_personas(
-            target_description,
-            max_results=max_personas
-        )
+        personas = self._select_personas(target_description, max_personas)
 
         if not personas:
             return {
@@ -119,58 +227,129 @@ class NemotronInstagramPipeline:
         # 重複削除
         unique_keywords = list(dict.fromkeys(all_keywords))[:15]  # 最大15キーワード
         print(f"生成キーワード: {unique_keywords}")
+        cache_stats = self.keyword_generator.stats()
+        print(f"  キャッシュヒット率: {cache_stats['hit_rate']:.0%} ({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']})")
 
         # ステップ3: Instagram データ取得
         print("\n【ステップ3/5】Instagram データ取得 (Apify API)")
 
         instagram_data = None
-        try:
-            instagram_data = self.apify_client.search_combined(
-                keywords=unique_keywords,
-                max_posts_per_keyword=max_posts_per_keyword,
-                max_profiles=max_profiles,
-                timeout=180
-            )
-        except Exception as e:
-            print(f"⚠️ Instagram データ取得失敗: {e}")
+        fetch_deadline = None
+        fetch_skipped = False
+        if deadline is not None:
+            fetch_deadline = deadline - time_budget * self.POST_FETCH_RESERVE_RATIO
+            print(f"時間予算: 残り{max(0.0, fetch_deadline - self.apify_client.clock()):.0f}秒 (取得ステージ)")
+
+        if fetch_deadline is not None and fetch_deadline <= self.apify_client.clock():
+            print("⚠️ 時間予算切れ: Instagram データ取得をスキップします")
+            fetch_skipped = True
             print("  → Nemotron のみで統合を続行します (信頼性スコア低下)")
+        else:
+            snapshot_writer = SnapshotWriter(snapshot_dir) if snapshot_dir else None
+            try:
+                instagram_data = self.apify_client.search_combined(
+                    keywords=unique_keywords,
+                    max_posts_per_keyword=max_posts_per_keyword,
+                    max_profiles=max_profiles,
+                    timeout=180,
+                    deadline=fetch_deadline,
+                    snapshot_writer=snapshot_writer,
+                    profile_store=self.profile_store,
+                    max_keywords=scrape_budget,
+                    keyword_tracker=self.keyword_tracker
+                )
+            except Exception as e:
+                print(f"⚠️ Instagram データ取得失敗: {e}")
+                print("  → Nemotron のみで統合を続行します (信頼性スコア低下)")
+            finally:
+                if snapshot_writer is not None:
+                    snapshot_writer.close(meta={
+                        "target_description": target_description,
+                        "nemotron_personas": personas,
+                        "keywords": instagram_data.get("keywords") if instagram_data else [],
+                        "candidate_keywords": unique_keywords,
+                        "coverage": instagram_data.get("coverage") if instagram_data else None
+                    })
+                    print(f"💾 スナップショット保存: {snapshot_dir}")
+
+        coverage = instagram_data.get("coverage") if instagram_data else None
+        # 時間予算切れで取得を省略・中断した場合のみ partial (API エラーは含めない)
+        partial = fetch_skipped or bool(coverage and coverage.get("budget_exhausted"))
 
         # ステップ4: データ統合
         print("\n【ステップ4/5】データ統合・信頼性評価")
 
-        integrated_personas = []
-        for persona in personas:
-            integrated = self.integrator.integrate(persona, instagram_data)
-            trust_score = integrated.get("信頼性スコア", 0)
+        if integration_workers > 1 and len(personas) > 1:
+            print(f"  並列統合: {integration_workers}ワーカー")
+            integrated_results = integrate_parallel(
+                personas,
+                instagram_data,
+                PersonaIntegrator,
+                workers=integration_workers
+            )
+        else:
+            # ジェネレータで1件ずつ統合 (出力先がある場合は統合直後に書き出す)
+            integrated_results = (
+                self.integrator.integrate(persona, instagram_data) for persona in personas
+            )
 
-            print(f"  ペルソナ: {persona.get('occupation')} → 信頼性スコア: {trust_score}/100")
+        sinks = open_report_sinks(output_paths, self.integrator.format_output) if output_paths else []
+        try:
+            integrated_personas = []
+            for persona, integrated in zip(personas, integrated_results):
+                trust_score = integrated.get("信頼性スコア", 0)
+
+                print(f"  ペルソナ: {persona.get('occupation')} → 信頼性スコア: {trust_score}/100")
+
+                # 最低スコア以上のみ採用
+                adopted = trust_score >= min_trust_score
+                if adopted:
+                    integrated_personas.append(integrated)
+                else:
+                    print(f"    ⚠️ スコア不足 (最低{min_trust_score}点必要)")
+
+                for sink in sinks:
+                    sink.write_persona(persona, integrated, adopted)
+
+            if not integrated_personas:
+                print(f"\n⚠️ 信頼性スコア{min_trust_score}点以上のペルソナがありません")
+                print("  → 最低スコアを下げるか、Instagram データを改善してください")
+
+            # ステップ5: Markdown レポート生成
+            print("\n【ステップ5/5】Markdown レポート生成")
+
+            summary_report = self._generate_summary_report(
+                target_description,
+                personas,
+                instagram_data,
+                integrated_personas,
+                time_budget=time_budget,
+                partial=partial
+            )
 
-            # 最低スコア以上のみ採用
-            if trust_score >= min_trust_score:
-                integrated_personas.append(integrated)
+            if sinks:
+                # ペルソナ節は書き出し済み → サマリーを付けて確定
+                for sink in sinks:
+                    sink.close(summary_report)
+                    print(f"📄 レポート出力: {sink.path}")
+                full_report = None
             else:
-                print(f"    ⚠️ スコア不足 (最低{min_trust_score}点必要)")
-
-        if not integrated_personas:
-            print(f"\n⚠️ 信頼性スコア{min_trust_score}点以上のペルソナがありません")
-            print("  → 最低スコアを下げるか、Instagram データを改善してください")
-
-        # ステップ5: Markdown レポート生成
-        print("\n【ステップ5/5】Markdown レポート生成")
-
-        markdown_reports = []
-        for i, integrated in enumerate(integrated_personas, 1):
-            report = self.integrator.format_output(integrated)
-            markdown_reports.append(f"## ペルソナ {i}\n\n{report}\n\n---\n")
-
-        # 統合レポート
-        full_report = self._generate_summary_report(
-            target_description,
-            personas,
-            instagram_data,
-            integrated_personas
-        )
-        full_report += "\n\n" + "\n\n".join(markdown_reports)
+                markdown_reports = []
+                for i, integrated in enumerate(integrated_personas, 1):
+                    report = self.integrator.format_output(integrated)
+                    markdown_reports.append(f"## ペルソナ {i}\n\n{report}\n\n---\n")
+
+                # 統合レポート
+                full_report = summary_report + "\n\n" + "\n\n".join(markdown_reports)
+        except BaseException:
+            # 統合途中のエラー: ファイルを閉じ、一時ファイル・書きかけの出力を削除
+            abort_report_sinks(sinks)
+            raise
+
+        # スナップショット保存時は生データを手放し、要約のみ保持
+        if snapshot_dir and instagram_data is not None:
+            with SnapshotReader(snapshot_dir) as reader:
+                instagram_data = reader.summary()
 
         print("\n" + "=" * 70)
         print("✅ パイプライン完了")
@@ -181,18 +360,84 @@ class NemotronInstagramPipeline:
             "target_description": target_description,
             "nemotron_personas": personas,
             "instagram_data": instagram_data,
+            "snapshot_path": snapshot_dir,
             "integrated_personas": integrated_personas,
             "markdown_report": full_report,
+            "output_paths": output_paths or [],
             "total_personas": len(integrated_personas),
+            "partial": partial,
+            "coverage": coverage,
+            "keyword_cache_stats": self.keyword_generator.stats(),
             "avg_trust_score": sum(p.get("信頼性スコア", 0) for p in integrated_personas) / len(integrated_personas) if integrated_personas else 0
         }
 
+    def _persona_store_fingerprint(self) -> Optional[str]:
+        """選定に使うペルソナデータセットのフィンガープリント (判定できない場合は None)"""
+        for dataset in (self.persona_dataset, getattr(self.nemotron_selector, "dataset", None)):
+            fingerprint = getattr(dataset, "_fingerprint", None)
+            if fingerprint:
+                return fingerprint
+        return None
+
+    def _select_personas(self, target_description: str, max_personas: int) -> List[Dict]:
+        """ペルソナ選定 (キャッシュ → 索引による絞り込み → ルールベース順位付け)"""
+        if self.selection_cache is None:
+            return self._select_personas_uncached(target_description, max_personas)
+
+        cache_params = {
+            "max_results": max_personas,
+            "shortlist_size": self.shortlist_size if self.persona_index is not None else None
+        }
+        personas = self.selection_cache.get(target_description, **cache_params)
+        if personas is not None:
+            print("  ⚡ 選定キャッシュを使用")
+            return personas
+
+        personas = self._select_personas_uncached(target_description, max_personas)
+        if personas:
+            self.selection_cache.put(target_description, personas, **cache_params)
+        return personas
+
+    def _select_personas_uncached(self, target_description: str, max_personas: int) -> List[Dict]:
+        """ペルソナ選定 (索引がある場合は候補を絞り込んでから順位付け)"""
+        if self.persona_index is None:
+            return self.nemotron_selector.select_personas(
+                target_description,
+                max_results=max_personas
+            )
+
+        start_time = time.time()
+        rows = [row for row, _ in self.persona_index.search(target_description, top_k=self.shortlist_size)]
+        print(f"  索引候補: {len(rows)}件 ({time.time() - start_time:.2f}秒)")
+
+        if "candidates" in inspect.signature(self.nemotron_selector.select_personas).parameters:
+            return self.nemotron_selector.select_personas(
+                target_description,
+                max_results=max_personas,
+                candidates=self.persona_index.shortlist(
+                    target_description, self.persona_dataset, top_k=self.shortlist_size
+                )
+            )
+
+        # 選定器のデータセットを候補だけに差し替えてルールベーススコアで順位付け
+        original_dataset = self.nemotron_selector.dataset
+        self.nemotron_selector.dataset = self.persona_dataset.select(rows)
+        try:
+            return self.nemotron_selector.select_personas(
+                target_description,
+                max_results=max_personas
+            )
+        finally:
+            self.nemotron_selector.dataset = original_dataset
+
     def _generate_summary_report(
         self,
         target: str,
         nemotron_personas: List[Dict],
         instagram_data: Optional[Dict],
-        integrated_personas: List[Dict]
+        integrated_personas: List[Dict],
+        time_budget: Optional[float] = None,
+        partial: bool = False
     ) -> str:
         """サマリーレポート生成"""
         report = []
@@ -209,10 +454,26 @@ class NemotronInstagramPipeline:
         if instagram_data:
             report.append(f"- **Instagram 投稿**: {instagram_data.get('total_posts', 0)}件取得")
             report.append(f"- **Instagram プロフィール**: {instagram_data.get('total_profiles', 0)}件取得")
-            report.append(f"- **検索キーワード**: {', '.join(instagram_data.get('keywords', [])[:5])}")
+            # 実際に投稿検索したキーワード (取得計画で選択したもの)
+            searched = (instagram_data.get("coverage") or {}).get(
+                "keywords_requested", instagram_data.get("keywords", [])
+            )
+            report.append(f"- **検索キーワード**: {', '.join(searched)}")
+        elif partial:
+            report.append("- **Instagram データ**: 時間予算切れのため未取得")
         else:
             report.append("- **Instagram データ**: 取得失敗")
 
+        coverage = instagram_data.get("coverage") if instagram_data else None
+        if partial and coverage:
+            report.append(
+                f"- **取得カバレッジ** (時間予算 {time_budget:.0f}秒で打ち切り): "
+                f"完了 {len(coverage.get('keywords_completed', []))}/{len(coverage.get('keywords_requested', []))}キーワード, "
+                f"途中打ち切り {len(coverage.get('keywords_partial', []))}件, "
+                f"未実行 {len(coverage.get('keywords_skipped', []))}件, "
+                f"プロフィール {coverage.get('profiles_status')}"
+            )
+
         report.append("")
 
         # 統合結果サマリー
@@ -268,29 +529,126 @@ if __name__ == "__main__":
         default=20,
         help="キーワードあたりの最大投稿数 (デフォルト: 20)"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="データ統合のワーカープロセス数 (デフォルト: 1)"
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=None,
+        help="全体の時間予算 (秒、デフォルト: 無制限)"
+    )
+    parser.add_argument(
+        "--snapshot-dir",
+        type=str,
+        default=None,
+        help="Instagram データのスナップショット保存先 (デフォルト: 保存しない)"
+    )
+    parser.add_argument(
+        "--persona-index",
+        type=str,
+        default=None,
+        help="ペルソナ索引ディレクトリ (デフォルト: 索引を使わず全件から選定)"
+    )
+    parser.add_argument(
+        "--selection-cache",
+        type=str,
+        default=None,
+        help="ペルソナ選定結果のキャッシュファイル (デフォルト: キャッシュなし)"
+    )
+    parser.add_argument(
+        "--persona-store-version",
+        type=str,
+        default=None,
+        help="ペルソナデータのバージョン (変更時は選定キャッシュを破棄、デフォルト: データセットのフィンガープリント)"
+    )
+    parser.add_argument(
+        "--profile-store",
+        type=str,
+        default=None,
+        help="Instagram プロフィールのローカルストア (デフォルト: 毎回取得)"
+    )
+    parser.add_argument(
+        "--keyword-stats",
+        type=str,
+        default=None,
+        help="キーワード収量の記録ファイル (デフォルト: 記録せず生成順に取得)"
+    )
+    parser.add_argument(
+        "--scrape-budget",
+        type=int,
+        default=5,
+        help="投稿検索するキーワード数 (デフォルト: 5)"
+    )
     parser.add_argument(
         "--output",
         type=str,
         default="persona_report.md",
-        help="出力ファイル名 (デフォルト: persona_report.md)"
+        help="出力ファイル名 (カンマ区切りで複数指定可、拡張子 .md / .jsonl / .csv で形式を選択、"
+             "デフォルト: persona_report.md)"
+    )
+
+    parser.add_argument(
+        "--record-apify",
+        type=str,
+        default=None,
+        help="Apify API とのやり取りを記録するカセットファイル"
+    )
+    parser.add_argument(
+        "--replay-apify",
+        type=str,
+        default=None,
+        help="記録済みカセットを再生 (Apify API を呼ばずに実行)"
+    )
+    parser.add_argument(
+        "--replay-time-scale",
+        type=float,
+        default=0.0,
+        help="再生時の待ち時間の倍率 (デフォルト: 0 = 待ち時間なし、1 = 記録時と同じ)"
     )
 
     args = parser.parse_args()
 
+    # Apify 通信の記録・再生
+    apify_http = None
+    apify_token = None
+    if args.record_apify and args.replay_apify:
+        parser.error("--record-apify と --replay-apify は同時に指定できません")
+    if args.record_apify:
+        apify_http = CassetteSession(args.record_apify, mode="record")
+    elif args.replay_apify:
+        apify_http = CassetteSession(args.replay_apify, mode="replay", time_scale=args.replay_time_scale)
+        apify_token = os.getenv("APIFY_API_TOKEN") or "replay"
+
     # パイプライン実行
-    pipeline = NemotronInstagramPipeline()
+    pipeline = NemotronInstagramPipeline(
+        apify_token=apify_token,
+        persona_index_dir=args.persona_index,
+        selection_cache_path=args.selection_cache,
+        persona_store_version=args.persona_store_version,
+        profile_store_path=args.profile_store,
+        keyword_stats_path=args.keyword_stats,
+        apify_http=apify_http
+    )
     result = pipeline.run(
         target_description=args.target,
         max_personas=args.max_personas,
-        max_posts_per_keyword=args.max_posts
+        max_posts_per_keyword=args.max_posts,
+        time_budget=args.time_budget,
+        integration_workers=args.workers,
+        snapshot_dir=args.snapshot_dir,
+        output_paths=[path.strip() for path in args.output.split(",") if path.strip()],
+        scrape_budget=args.scrape_budget
     )
+    if apify_http is not None:
+        apify_http.close()
 
-    # レポート保存
+    # レポートは run 内で出力済み
     if result["success"]:
-        with open(args.output, "w", encoding="utf-8") as f:
-            f.write(result["markdown_report"])
-
-        print(f"\n📄 レポート保存: {args.output}")
+        print(f"\n📄 レポート保存: {', '.join(result['output_paths'])}")
         print(f"📊 統合ペルソナ数: {result['total_personas']}件")
         print(f"⭐ 平均信頼性スコア: {result['avg_trust_score']:.1f}/100")
     else:
@@ -0,0 +1,77 @@
+"""
+ペルソナ統合の並列実行
+
+Instagram データを一時ファイルに1回だけ書き出し、各ワーカープロセスは
+起動時に1回だけ読み込む。タスクごとに渡すのはペルソナのみのため、
+投稿数が多くてもタスクごとのコーパスの再シリアライズは発生しない。
+
+PersonaIntegrator は投稿リストを Python オブジェクトとして受け取るため、
+各ワーカーはコーパスのコピーを1つずつ保持する (メモリ使用量はワーカー数に比例)。
+"""
+
+import os
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+
+# ワーカープロセス内の状態 (initializer で設定)
+_worker_integrator = None
+_worker_instagram_data = None
+
+
+def _init_worker(integrator_factory: Callable[[], object], corpus_path: Optional[str]):
+    """ワーカー初期化: 統合器生成とコーパスの読み込み (ワーカーごとに1回、ワーカーごとに1コピー)"""
+    global _worker_integrator, _worker_instagram_data
+
+    _worker_integrator = integrator_factory()
+    _worker_instagram_data = None
+
+    if corpus_path:
+        with open(corpus_path, "rb") as f:
+            _worker_instagram_data = pickle.load(f)
+
+
+def _integrate_one(persona: Dict) -> Dict:
+    """ワーカー内で1ペルソナを統合"""
+    return _worker_integrator.integrate(persona, _worker_instagram_data)
+
+
+def integrate_parallel(
+    personas: List[Dict],
+    instagram_data: Optional[Dict],
+    integrator_factory: Callable[[], object],
+    workers: int = 4
+) -> List[Dict]:
+    """
+    複数ペルソナを並列に統合
+
+    Args:
+        personas: Nemotron ペルソナリスト
+        instagram_data: Instagram データ (None 可)
+        integrator_factory: 統合器を生成する callable (例: PersonaIntegrator)
+        workers: ワーカープロセス数
+
+    Returns:
+        統合ペルソナリスト (入力と同じ順序)
+    """
+    corpus_path = None
+    try:
+        if instagram_data is not None:
+            fd, corpus_path = tempfile.mkstemp(prefix="instagram_corpus_", suffix=".pickle")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(instagram_data, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        workers = max(1, min(workers, len(personas)))
+        chunksize = max(1, len(personas) // (workers * 4))
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(integrator_factory, corpus_path)
+        ) as executor:
+            return list(executor.map(_integrate_one, personas, chunksize=chunksize))
+    finally:
+        if corpus_path and os.path.exists(corpus_path):
+            os.remove(corpus_path)
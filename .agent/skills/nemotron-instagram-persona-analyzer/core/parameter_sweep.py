@@ -0,0 +1,245 @@
+"""
+パラメータスイープ
+
+保存済みスナップショット (ペルソナ + Instagram データ) を使い、
+ステップ4-5 (データ統合・信頼性評価・採用判定) だけを複数パラメータで再評価する。
+Instagram の再取得やペルソナ再選定は行わない。
+
+統合はペルソナごとに1回だけ行い、各グリッド点では閾値判定のみを行う。
+デフォルト配点 (40/40/20) では統合器の信頼性スコアをそのまま使う。
+配点を変える場合は、統合器が score_components(integrated) で構成要素
+(Nemotron, Instagram, 整合性 の達成率 0.0-1.0) を返す必要があり、
+各グリッド点ではその重み付け和で再評価する。
+"""
+
+import sys
+from itertools import product
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# プロジェクトルートをPythonパスに追加
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+# Skillコアモジュールをパスに追加
+skill_core = Path(__file__).parent
+sys.path.insert(0, str(skill_core))
+
+from snapshot_store import SnapshotReader
+
+
+# デフォルト配点 (Nemotron, Instagram, 整合性)
+DEFAULT_WEIGHTS = (40, 40, 20)
+
+
+class ScoreDecompositionError(ValueError):
+    """信頼性スコアの構成要素を得られない (配点を変えたスイープができない)"""
+
+
+def score_components(integrated: Dict, integrator) -> Tuple[float, float, float]:
+    """
+    統合器から信頼性スコアの構成要素 (0.0-1.0) を取得
+
+    デフォルト配点で統合器の信頼性スコアを再現できることも検証する。
+
+    Args:
+        integrated: PersonaIntegrator.integrate の戻り値
+        integrator: score_components(integrated) を持つ統合器
+
+    Returns:
+        (Nemotron, Instagram, 整合性) の達成率
+
+    Raises:
+        ScoreDecompositionError: 構成要素が範囲外、またはデフォルト配点で信頼性スコアを再現できない場合
+    """
+    parts = tuple(integrator.score_components(integrated))
+    rebuilt = sum(w * c for w, c in zip(DEFAULT_WEIGHTS, parts))
+    actual = integrated.get("信頼性スコア", 0)
+    if len(parts) != 3 or any(not 0.0 <= c <= 1.0 for c in parts) or abs(rebuilt - actual) > 1e-6:
+        raise ScoreDecompositionError(
+            f"構成要素 {parts} からの再計算 {rebuilt:g} が信頼性スコア {actual} と一致しません"
+        )
+    return parts
+
+
+def run_parameter_sweep(
+    personas: List[Dict],
+    instagram_data: Optional[Dict],
+    max_personas_grid: Sequence[int],
+    min_trust_score_grid: Sequence[int],
+    weights_grid: Sequence[Tuple[float, float, float]] = (DEFAULT_WEIGHTS,),
+    integrator=None
+) -> List[Dict]:
+    """
+    パラメータスイープ実行
+
+    Args:
+        personas: 選定済みペルソナ (選定順)
+        instagram_data: Instagram データ
+        max_personas_grid: max_personas の候補
+        min_trust_score_grid: min_trust_score の候補
+        weights_grid: 配点 (Nemotron, Instagram, 整合性) の候補
+            デフォルト以外を含む場合は統合器に score_components が必要
+        integrator: 統合器 (省略時は PersonaIntegrator)
+
+    Returns:
+        グリッド点ごとの結果 (採用数、平均信頼性スコア、信頼性レベル分布)
+
+    Raises:
+        ScoreDecompositionError: デフォルト以外の配点で、統合器が構成要素を返さない場合
+    """
+    if integrator is None:
+        from lib.persona_integrator import PersonaIntegrator
+
+        integrator = PersonaIntegrator()
+
+    weights_grid = [tuple(weights) for weights in weights_grid]
+    reweight = any(weights != DEFAULT_WEIGHTS for weights in weights_grid)
+    if reweight and not callable(getattr(integrator, "score_components", None)):
+        raise ScoreDecompositionError(
+            "デフォルト以外の配点をスイープするには、統合器が score_components(integrated) を"
+            f"実装している必要があります ({type(integrator).__name__} は未実装)"
+        )
+
+    limit = min(max(max_personas_grid), len(personas))
+
+    # ステップ4: 統合はペルソナごとに1回だけ
+    integrated_list = [integrator.integrate(persona, instagram_data) for persona in personas[:limit]]
+    actual_scores = [integrated.get("信頼性スコア", 0) for integrated in integrated_list]
+    components = [score_components(integrated, integrator) for integrated in integrated_list] if reweight else []
+
+    results = []
+    for weights in weights_grid:
+        if weights == DEFAULT_WEIGHTS:
+            scores = actual_scores
+        else:
+            scores = [sum(w * c for w, c in zip(weights, parts)) for parts in components]
+
+        for max_personas, min_trust_score in product(max_personas_grid, min_trust_score_grid):
+            adopted = [s for s in scores[:max_personas] if s >= min_trust_score]
+            results.append({
+                "weights": weights,
+                "max_personas": max_personas,
+                "min_trust_score": min_trust_score,
+                "evaluated": min(max_personas, len(scores)),
+                "adopted": len(adopted),
+                "avg_trust_score": sum(adopted) / len(adopted) if adopted else 0,
+                "high_trust": sum(1 for s in adopted if s >= 80),
+                "medium_trust": sum(1 for s in adopted if 60 <= s < 80),
+                "low_trust": sum(1 for s in adopted if s < 60)
+            })
+
+    return results
+
+
+def run_sweep_from_snapshot(snapshot_dir: str, **kwargs) -> List[Dict]:
+    """
+    スナップショットからパラメータスイープ実行
+
+    Args:
+        snapshot_dir: NemotronInstagramPipeline.run(snapshot_dir=...) の保存先
+        **kwargs: run_parameter_sweep の引数
+
+    Returns:
+        グリッド点ごとの結果
+    """
+    with SnapshotReader(snapshot_dir) as snapshot:
+        personas = snapshot.meta.get("nemotron_personas")
+        if not personas:
+            raise ValueError(f"スナップショットにペルソナが保存されていません: {snapshot_dir}")
+        instagram_data = snapshot.to_instagram_data()
+
+    return run_parameter_sweep(personas, instagram_data, **kwargs)
+
+
+def format_sweep_report(results: List[Dict]) -> str:
+    """スイープ結果の Markdown 表"""
+    report = []
+    report.append("# パラメータスイープ結果")
+    report.append("")
+    report.append("| 配点 (N/I/C) | max_personas | min_trust_score | 採用数 | 平均信頼性スコア | 高 | 中 | 低 |")
+    report.append("|---|---|---|---|---|---|---|---|")
+
+    for r in results:
+        weights = "/".join(f"{w:g}" for w in r["weights"])
+        report.append(
+            f"| {weights} | {r['max_personas']} | {r['min_trust_score']} | "
+            f"{r['adopted']}/{r['evaluated']} | {r['avg_trust_score']:.1f} | "
+            f"{r['high_trust']} | {r['medium_trust']} | {r['low_trust']} |"
+        )
+
+    return "\n".join(report) + "\n"
+
+
+def _parse_int_list(value: str) -> List[int]:
+    """'1,3,5' または '40:80:10' (開始:終了:刻み) 形式をパース"""
+    if ":" in value:
+        start, stop, step = (int(v) for v in value.split(":"))
+        return list(range(start, stop + 1, step))
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def _parse_weights(value: str) -> List[Tuple[float, float, float]]:
+    """'40/40/20,30/50/20' 形式をパース"""
+    weights = []
+    for item in value.split(","):
+        parts = [float(v) for v in item.split("/")]
+        if len(parts) != 3:
+            raise ValueError(f"配点は 'Nemotron/Instagram/整合性' の3値で指定してください: {item}")
+        weights.append(tuple(parts))
+    return weights
+
+
+# CLI エントリーポイント
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="保存済みスナップショットで信頼性評価パラメータをスイープ"
+    )
+    parser.add_argument(
+        "snapshot_dir",
+        type=str,
+        help="スナップショットディレクトリ (pipeline の --snapshot-dir)"
+    )
+    parser.add_argument(
+        "--max-personas",
+        type=str,
+        default="3",
+        help="max_personas の候補 (例: '1,3,5' または '1:10:1'、デフォルト: 3)"
+    )
+    parser.add_argument(
+        "--min-trust-scores",
+        type=str,
+        default="40:80:10",
+        help="min_trust_score の候補 (例: '60,80' または '40:80:10'、デフォルト: 40:80:10)"
+    )
+    parser.add_argument(
+        "--weights",
+        type=str,
+        default="40/40/20",
+        help="配点の候補 (例: '40/40/20,30/50/20'、デフォルト: 40/40/20)"
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="出力ファイル名 (省略時は標準出力)"
+    )
+
+    args = parser.parse_args()
+
+    results = run_sweep_from_snapshot(
+        args.snapshot_dir,
+        max_personas_grid=_parse_int_list(args.max_personas),
+        min_trust_score_grid=_parse_int_list(args.min_trust_scores),
+        weights_grid=_parse_weights(args.weights)
+    )
+    report = format_sweep_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+        print(f"📄 スイープ結果保存: {args.output} ({len(results)}パターン)")
+    else:
+        print(report)
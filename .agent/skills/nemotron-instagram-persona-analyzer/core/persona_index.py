@@ -0,0 +1,349 @@
+"""
+Nemotron ペルソナの近似近傍検索インデックス
+
+ペルソナのテキスト項目 (職業・キャリア目標・趣味・スキル) を
+文字 n-gram のハッシュ (TF-IDF) でベクトル化し、オフラインで索引を構築する。
+検索時は自由記述のターゲットを同じ方法でベクトル化し、上位候補だけを返す。
+候補の最終順位付けは NemotronPersonaSelector のルールベーススコアで行う。
+
+構造 (IVF 方式):
+    - セル = n-gram ハッシュのバケット
+    - 各ペルソナは重みの大きい上位 POSTINGS_PER_ROW 個のセルに登録
+    - 検索時はクエリの重みの大きいセルだけを走査し、候補をコサイン類似度で順位付け
+
+ファイル構成:
+    index_dir/
+    ├── meta.json           # 次元数・n-gram・対象項目・件数
+    ├── idf.bin             # バケットごとの IDF (float32)
+    ├── vector_ids.bin      # 各ペルソナの上位バケット番号 (uint16, 件数 x VECTOR_NNZ)
+    ├── vector_values.bin   # 上記の重み (uint8 量子化)
+    ├── list_offsets.bin    # セルごとの転置リスト開始位置 (uint32)
+    └── list_rows.bin       # 転置リスト本体 = ペルソナ行番号 (uint32)
+"""
+
+import heapq
+import json
+import math
+import mmap
+import unicodedata
+import zlib
+from array import array
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+# ベクトル化の対象項目
+INDEX_FIELDS = (
+    "occupation",
+    "career_goals_and_ambitions",
+    "hobbies_and_interests",
+    "skills_and_expertise",
+)
+
+INDEX_FORMAT_VERSION = 1
+DIMENSIONS = 1 << 15     # ハッシュバケット数 (uint16 に収まる範囲)
+NGRAM_SIZES = (2, 3)     # 文字 n-gram の長さ
+VECTOR_NNZ = 32          # ペルソナごとに保持する非ゼロ要素数
+POSTINGS_PER_ROW = 8     # ペルソナごとに登録するセル数
+
+
+def _ngram_buckets(text: str) -> Dict[int, int]:
+    """テキスト → {バケット番号: 出現回数}"""
+    text = " ".join(unicodedata.normalize("NFKC", text).lower().split())
+    counts: Dict[int, int] = {}
+    for n in NGRAM_SIZES:
+        for i in range(len(text) - n + 1):
+            gram = text[i:i + n]
+            if " " in gram:
+                continue
+            bucket = zlib.crc32(gram.encode("utf-8")) % DIMENSIONS
+            counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+
+def persona_text(persona: Dict, fields: Sequence[str] = INDEX_FIELDS) -> str:
+    """ペルソナのテキスト項目を連結"""
+    parts = []
+    for field in fields:
+        value = persona.get(field)
+        if isinstance(value, (list, tuple)):
+            parts.extend(str(v) for v in value)
+        elif value:
+            parts.append(str(value))
+    return " ".join(parts)
+
+
+def _tfidf(counts: Dict[int, int], idf: Sequence[float], nnz: int) -> List[Tuple[int, float]]:
+    """上位 nnz 個の TF-IDF 重み (L2 正規化済み、重み降順)"""
+    weights = [(bucket, (1.0 + math.log(tf)) * idf[bucket]) for bucket, tf in counts.items()]
+    top = heapq.nlargest(nnz, weights, key=lambda item: item[1])
+    norm = math.sqrt(sum(w * w for _, w in top)) or 1.0
+    return [(bucket, w / norm) for bucket, w in top]
+
+
+def build_persona_index(
+    personas: Iterable[Dict],
+    index_dir: str,
+    fields: Sequence[str] = INDEX_FIELDS
+) -> Dict:
+    """
+    ペルソナ索引の構築 (オフライン)
+
+    データセットを2回走査する (1回目: 文書頻度、2回目: ベクトル化と転置リスト)。
+    personas は再走査できる iterable (HuggingFace Dataset 等) を渡すこと。
+
+    Args:
+        personas: ペルソナの iterable (行番号 = 走査順)
+        index_dir: 保存先ディレクトリ
+        fields: ベクトル化の対象項目
+
+    Returns:
+        メタデータ
+    """
+    path = Path(index_dir)
+    path.mkdir(parents=True, exist_ok=True)
+
+    # 1回目: 文書頻度
+    print("🧮 ペルソナ索引構築 (1/2): 文書頻度集計")
+    doc_freq = array("I", bytes(4 * DIMENSIONS))
+    total_rows = 0
+    for persona in personas:
+        for bucket in _ngram_buckets(persona_text(persona, fields)):
+            doc_freq[bucket] += 1
+        total_rows += 1
+        if total_rows % 100000 == 0:
+            print(f"  {total_rows}件処理")
+
+    idf = array("f", (math.log((1 + total_rows) / (1 + df)) + 1.0 for df in doc_freq))
+
+    # 2回目: ベクトル化と転置リスト
+    print("🧮 ペルソナ索引構築 (2/2): ベクトル化・転置リスト作成")
+    vector_ids = array("H")
+    vector_values = array("B")
+    lists: Dict[int, array] = {}
+    row = -1
+    for row, persona in enumerate(personas):
+        top = _tfidf(_ngram_buckets(persona_text(persona, fields)), idf, VECTOR_NNZ)
+        padding = VECTOR_NNZ - len(top)
+        vector_ids.extend(bucket for bucket, _ in top)
+        vector_ids.extend([0] * padding)
+        vector_values.extend(min(255, round(w * 255)) for _, w in top)
+        vector_values.extend([0] * padding)
+
+        for bucket, _ in top[:POSTINGS_PER_ROW]:
+            postings = lists.get(bucket)
+            if postings is None:
+                postings = lists[bucket] = array("I")
+            postings.append(row)
+
+        if (row + 1) % 100000 == 0:
+            print(f"  {row + 1}件処理")
+
+    if row + 1 != total_rows:
+        raise ValueError("ペルソナの走査結果が1回目と2回目で一致しません (再走査できる iterable を渡してください)")
+
+    list_offsets = array("I", [0])
+    list_rows = array("I")
+    for bucket in range(DIMENSIONS):
+        list_rows.extend(lists.get(bucket, ()))
+        list_offsets.append(len(list_rows))
+
+    for name, data in (
+        ("idf.bin", idf),
+        ("vector_ids.bin", vector_ids),
+        ("vector_values.bin", vector_values),
+        ("list_offsets.bin", list_offsets),
+        ("list_rows.bin", list_rows),
+    ):
+        with open(path / name, "wb") as f:
+            data.tofile(f)
+
+    meta = {
+        "version": INDEX_FORMAT_VERSION,
+        "rows": total_rows,
+        "dimensions": DIMENSIONS,
+        "ngram_sizes": list(NGRAM_SIZES),
+        "vector_nnz": VECTOR_NNZ,
+        "postings_per_row": POSTINGS_PER_ROW,
+        "fields": list(fields)
+    }
+    with open(path / "meta.json", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+
+    print(f"✅ ペルソナ索引構築完了: {total_rows}件 → {path}")
+    return meta
+
+
+class PersonaIndex:
+    """
+    ペルソナ索引の読み込み・検索
+
+    索引ファイルはメモリマップで開くため、ロード時間は件数にほぼ依存しない。
+    """
+
+    def __init__(self, index_dir: str):
+        """
+        初期化
+
+        Args:
+            index_dir: build_persona_index の保存先
+        """
+        self.path = Path(index_dir)
+        meta_file = self.path / "meta.json"
+        if not meta_file.exists():
+            raise FileNotFoundError(f"ペルソナ索引が見つかりません: {self.path}")
+
+        self.meta = json.loads(meta_file.read_text(encoding="utf-8"))
+        if self.meta.get("version") != INDEX_FORMAT_VERSION or self.meta.get("dimensions") != DIMENSIONS:
+            raise ValueError(f"ペルソナ索引の形式が異なります (再構築してください): {self.path}")
+
+        self.rows = self.meta["rows"]
+        self.fields = tuple(self.meta["fields"])
+
+        self._files = []
+        self._maps = []
+        self._idf = self._open("idf.bin", "f")
+        self._vector_ids = self._open("vector_ids.bin", "H")
+        self._vector_values = self._open("vector_values.bin", "B")
+        self._list_offsets = self._open("list_offsets.bin", "I")
+        self._list_rows = self._open("list_rows.bin", "I")
+
+    def search(
+        self,
+        text: str,
+        top_k: int = 1000,
+        nprobe: int = 16,
+        max_candidates: int = 50000
+    ) -> List[Tuple[int, float]]:
+        """
+        近似近傍検索
+
+        Args:
+            text: 検索テキスト (ターゲット記述等)
+            top_k: 返却件数
+            nprobe: 走査する (空でない) セル数 (多いほど再現率が上がり遅くなる)
+            max_candidates: 類似度計算する候補数の上限
+
+        Returns:
+            (行番号, コサイン類似度) のリスト (類似度降順)
+        """
+        counts = _ngram_buckets(text)
+        query = _tfidf(counts, self._idf, len(counts))
+        if not query:
+            return []
+        query_weights = dict(query)
+
+        # 重みの大きいセルから順に、空でないセルを nprobe 個まで走査
+        candidates = set()
+        probed = 0
+        for bucket, _ in query:
+            start, end = self._list_offsets[bucket], self._list_offsets[bucket + 1]
+            if start == end:
+                continue
+            candidates.update(self._list_rows[start:end])
+            probed += 1
+            if probed >= nprobe or len(candidates) >= max_candidates:
+                break
+
+        nnz = self.meta["vector_nnz"]
+        scored = []
+        for row in candidates:
+            base = row * nnz
+            ids = self._vector_ids[base:base + nnz]
+            values = self._vector_values[base:base + nnz]
+            score = 0.0
+            for bucket, value in zip(ids, values):
+                weight = query_weights.get(bucket)
+                if weight is not None:
+                    score += weight * value
+            scored.append((row, score / 255))
+
+        return heapq.nlargest(top_k, scored, key=lambda item: item[1])
+
+    def shortlist(self, text: str, dataset, top_k: int = 1000, **kwargs) -> List[Dict]:
+        """
+        検索結果の行をデータセットから取得
+
+        Args:
+            text: 検索テキスト
+            dataset: 索引構築に使ったデータセット (datasets.Dataset またはリスト)
+            top_k: 返却件数
+            **kwargs: search の追加引数
+
+        Returns:
+            ペルソナリスト (類似度降順、各行に '_ann_score' を付与)
+        """
+        results = self.search(text, top_k=top_k, **kwargs)
+        rows = [row for row, _ in results]
+        if hasattr(dataset, "select"):
+            # datasets.Dataset は1行ずつのアクセスが遅いため一括取得
+            personas = dataset.select(rows)
+        else:
+            personas = [dataset[row] for row in rows]
+
+        shortlist = []
+        for persona, (_, score) in zip(personas, results):
+            persona = dict(persona)
+            persona["_ann_score"] = score
+            shortlist.append(persona)
+        return shortlist
+
+    def close(self):
+        """ファイルクローズ"""
+        for view in (self._idf, self._vector_ids, self._vector_values, self._list_offsets, self._list_rows):
+            view.release()
+        for mapped in self._maps:
+            mapped.close()
+        for f in self._files:
+            f.close()
+        self._maps = []
+        self._files = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _open(self, name: str, typecode: str) -> memoryview:
+        """索引ファイルをメモリマップし、型付きビューを返す"""
+        f = open(self.path / name, "rb")
+        self._files.append(f)
+        if f.seek(0, 2) == 0:
+            return memoryview(array(typecode))
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._maps.append(mapped)
+        return memoryview(mapped).cast(typecode)
+
+
+# CLI エントリーポイント (索引構築)
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Nemotron ペルソナの近似近傍検索インデックスを構築"
+    )
+    parser.add_argument(
+        "index_dir",
+        type=str,
+        help="索引の保存先ディレクトリ"
+    )
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default="nvidia/Nemotron-Personas-Japan",
+        help="HuggingFace データセット名 (デフォルト: nvidia/Nemotron-Personas-Japan)"
+    )
+    parser.add_argument(
+        "--split",
+        type=str,
+        default="train",
+        help="データセットの split (デフォルト: train)"
+    )
+
+    args = parser.parse_args()
+
+    from datasets import load_dataset
+
+    dataset = load_dataset(args.dataset, split=args.split)
+    build_persona_index(dataset.select_columns(list(INDEX_FIELDS)), args.index_dir)
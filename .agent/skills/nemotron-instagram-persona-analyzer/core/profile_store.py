@@ -0,0 +1,134 @@
+"""
+Instagram プロフィールのローカルストア
+
+取得済みプロフィールをユーザー名をキーに取得日時付きで SQLite に保存し、
+鮮度期限内のものは Apify を呼ばずに再利用する。
+キーワードごとのプロフィール検索結果 (ユーザー名リスト) も保存する。
+"""
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+def profile_key(profile: Dict) -> Optional[str]:
+    """ストアのキー (ユーザー名、なければID)"""
+    username = profile.get("username")
+    if username:
+        return username.lower()
+    profile_id = profile.get("id")
+    return str(profile_id) if profile_id else None
+
+
+class ProfileStore:
+    """
+    Instagram プロフィールのローカルストア (SQLite)
+    """
+
+    def __init__(self, db_path: str, max_age_hours: float = 168):
+        """
+        初期化
+
+        Args:
+            db_path: ストアファイル
+            max_age_hours: 鮮度期限 (時間、これより古いものは再取得対象)
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_age = max_age_hours * 3600
+
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS profiles (
+                key TEXT PRIMARY KEY,
+                profile_id TEXT,
+                payload TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS keyword_profiles (
+                keyword TEXT PRIMARY KEY,
+                usernames TEXT NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            """
+        )
+        self._conn.commit()
+
+    def get_many(self, usernames: Iterable[str]) -> Tuple[Dict[str, Dict], List[str]]:
+        """
+        鮮度期限内のプロフィール取得
+
+        Args:
+            usernames: ユーザー名リスト
+
+        Returns:
+            (鮮度期限内のプロフィール {キー: プロフィール}, 期限切れ・未取得のユーザー名リスト)
+        """
+        keys = list(dict.fromkeys(u.lower() for u in usernames if u))
+        fresh: Dict[str, Dict] = {}
+        threshold = time.time() - self.max_age
+
+        # SQLite の変数上限を避けるため分割して取得
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = self._conn.execute(
+                f"SELECT key, payload FROM profiles WHERE key IN ({placeholders}) AND fetched_at >= ?",
+                (*chunk, threshold)
+            ).fetchall()
+            for key, payload in rows:
+                fresh[key] = json.loads(payload)
+
+        stale = [key for key in keys if key not in fresh]
+        return fresh, stale
+
+    def put_many(self, profiles: Iterable[Dict]):
+        """プロフィール保存 (取得日時を現在時刻で更新)"""
+        now = time.time()
+        rows = []
+        for profile in profiles:
+            key = profile_key(profile)
+            if key:
+                rows.append((
+                    key,
+                    str(profile.get("id")) if profile.get("id") else None,
+                    json.dumps(profile, ensure_ascii=False, default=str),
+                    now
+                ))
+
+        self._conn.executemany("INSERT OR REPLACE INTO profiles VALUES (?, ?, ?, ?)", rows)
+        self._conn.commit()
+
+    def get_keyword(self, keyword: str) -> Optional[List[str]]:
+        """鮮度期限内のキーワード検索結果 (ユーザー名リスト、なければ None)"""
+        row = self._conn.execute(
+            "SELECT usernames FROM keyword_profiles WHERE keyword = ? AND fetched_at >= ?",
+            (keyword, time.time() - self.max_age)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_keyword(self, keyword: str, profiles: List[Dict]):
+        """キーワード検索結果の保存 (プロフィール本体も保存)"""
+        self.put_many(profiles)
+        usernames = [key for key in (profile_key(p) for p in profiles) if key]
+        self._conn.execute(
+            "INSERT OR REPLACE INTO keyword_profiles VALUES (?, ?, ?)",
+            (keyword, json.dumps(usernames, ensure_ascii=False), time.time())
+        )
+        self._conn.commit()
+
+    def stats(self) -> Dict:
+        """ストア統計 (総件数・鮮度期限内の件数)"""
+        total = self._conn.execute("SELECT COUNT(*) FROM profiles").fetchone()[0]
+        fresh = self._conn.execute(
+            "SELECT COUNT(*) FROM profiles WHERE fetched_at >= ?",
+            (time.time() - self.max_age,)
+        ).fetchone()[0]
+        return {"total": total, "fresh": fresh}
+
+    def close(self):
+        """接続クローズ"""
+        self._conn.close()
@@ -0,0 +1,216 @@
+"""
+レポートのストリーミング出力
+
+統合したペルソナを1件ずつファイルへ書き出し、全ペルソナ分のレポートを
+メモリ上で連結しない。出力形式はファイル拡張子で選択する:
+    .md    Markdown レポート (従来と同じ構成)
+    .jsonl 統合ペルソナ1件 = 1行の JSON
+    .csv   スコア・基本属性の表形式 (1ペルソナ = 1行)
+"""
+
+import csv
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Callable, Dict, List
+
+
+def _open_temp_beside(path: Path, **kwargs):
+    """出力ファイルと同じディレクトリに一時ファイルを作成 (os.replace で置き換えるため)"""
+    fd, temp_path = tempfile.mkstemp(
+        prefix=f".{path.name}.", suffix=".part", dir=str(path.parent.resolve())
+    )
+    return os.fdopen(fd, "w", encoding="utf-8", **kwargs), temp_path
+
+
+def _discard(temp_file, temp_path: str):
+    """一時ファイルの破棄"""
+    temp_file.close()
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+
+class MarkdownReportSink:
+    """
+    Markdown レポート出力
+
+    サマリー (先頭) は全ペルソナの統合後に確定するため、ペルソナ節は
+    一時ファイルへ逐次書き出し、close 時にサマリーの後ろへ連結する。
+    出力ファイルは close 時に置き換えるため、中止時は前回の出力が残る。
+    """
+
+    def __init__(self, path: str, formatter: Callable[[Dict], str]):
+        """
+        初期化
+
+        Args:
+            path: 出力ファイル
+            formatter: 統合ペルソナ → Markdown (PersonaIntegrator.format_output)
+        """
+        self.path = Path(path)
+        self.formatter = formatter
+        self.count = 0
+
+        self._body, self._body_path = _open_temp_beside(self.path)
+
+    def write_persona(self, persona: Dict, integrated: Dict, adopted: bool):
+        """ペルソナ節の追記 (採用ペルソナのみ)"""
+        if not adopted:
+            return
+        self.count += 1
+        separator = "\n\n" if self.count > 1 else ""
+        self._body.write(f"{separator}## ペルソナ {self.count}\n\n{self.formatter(integrated)}\n\n---\n")
+
+    def close(self, summary: str):
+        """サマリー + ペルソナ節を出力ファイルに書き出し"""
+        self._body.close()
+        out, out_path = _open_temp_beside(self.path)
+        try:
+            with out:
+                out.write(summary + "\n\n")
+                with open(self._body_path, encoding="utf-8") as body:
+                    shutil.copyfileobj(body, out)
+            os.replace(out_path, self.path)
+        except BaseException:
+            _discard(out, out_path)
+            raise
+        finally:
+            os.remove(self._body_path)
+
+    def abort(self):
+        """書き出し中止 (一時ファイルを削除、出力ファイルは変更しない)"""
+        _discard(self._body, self._body_path)
+
+
+class JsonlExportSink:
+    """
+    統合ペルソナの JSONL 出力 (採用・不採用とも出力)
+
+    一時ファイルへ書き出し、close 時に出力ファイルを置き換える。
+    """
+
+    def __init__(self, path: str):
+        """
+        初期化
+
+        Args:
+            path: 出力ファイル
+        """
+        self.path = Path(path)
+        self._file, self._temp_path = _open_temp_beside(self.path)
+
+    def write_persona(self, persona: Dict, integrated: Dict, adopted: bool):
+        """1ペルソナ = 1行"""
+        record = {
+            "trust_score": integrated.get("信頼性スコア", 0),
+            "adopted": adopted,
+            "persona": persona,
+            "integrated": integrated
+        }
+        self._file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+    def close(self, summary: str):
+        """出力ファイルの置き換え (サマリーは出力しない)"""
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def abort(self):
+        """書き出し中止 (一時ファイルを削除、出力ファイルは変更しない)"""
+        _discard(self._file, self._temp_path)
+
+
+class CsvExportSink:
+    """
+    信頼性スコアと基本属性の表形式 (CSV) 出力
+
+    一時ファイルへ書き出し、close 時に出力ファイルを置き換える。
+    """
+
+    COLUMNS = [
+        "uuid",
+        "occupation",
+        "age",
+        "sex",
+        "prefecture",
+        "trust_score",
+        "no_contradiction",
+        "adopted",
+    ]
+
+    def __init__(self, path: str):
+        """
+        初期化
+
+        Args:
+            path: 出力ファイル
+        """
+        self.path = Path(path)
+        self._file, self._temp_path = _open_temp_beside(self.path, newline="")
+        self._writer = csv.DictWriter(self._file, fieldnames=self.COLUMNS)
+        self._writer.writeheader()
+
+    def write_persona(self, persona: Dict, integrated: Dict, adopted: bool):
+        """1ペルソナ = 1行"""
+        self._writer.writerow({
+            "uuid": persona.get("uuid"),
+            "occupation": persona.get("occupation"),
+            "age": persona.get("age"),
+            "sex": persona.get("sex"),
+            "prefecture": persona.get("prefecture"),
+            "trust_score": integrated.get("信頼性スコア", 0),
+            "no_contradiction": integrated.get("矛盾チェック", {}).get("矛盾なし"),
+            "adopted": adopted
+        })
+
+    def close(self, summary: str):
+        """出力ファイルの置き換え (サマリーは出力しない)"""
+        self._file.close()
+        os.replace(self._temp_path, self.path)
+
+    def abort(self):
+        """書き出し中止 (一時ファイルを削除、出力ファイルは変更しない)"""
+        _discard(self._file, self._temp_path)
+
+
+def open_report_sinks(paths: List[str], formatter: Callable[[Dict], str]) -> List:
+    """
+    出力先リストから出力形式を判定してシンクを生成
+
+    Args:
+        paths: 出力ファイルリスト (拡張子 .md / .jsonl / .csv)
+        formatter: 統合ペルソナ → Markdown
+
+    Returns:
+        シンクリスト
+    """
+    sink_types = []
+    for path in paths:
+        suffix = Path(path).suffix.lower()
+        if suffix in (".md", ".markdown"):
+            sink_types.append((path, lambda p: MarkdownReportSink(p, formatter)))
+        elif suffix == ".jsonl":
+            sink_types.append((path, JsonlExportSink))
+        elif suffix == ".csv":
+            sink_types.append((path, CsvExportSink))
+        else:
+            raise ValueError(f"未対応の出力形式です (.md / .jsonl / .csv): {path}")
+
+    sinks = []
+    try:
+        for path, factory in sink_types:
+            sinks.append(factory(path))
+    except BaseException:
+        abort_report_sinks(sinks)
+        raise
+    return sinks
+
+
+def abort_report_sinks(sinks: List):
+    """全シンクの書き出し中止 (エラー時の後始末)"""
+    for sink in sinks:
+        try:
+            sink.abort()
+        except Exception as e:
+            print(f"  ⚠️ 出力の後始末に失敗: {sink.path}: {e}")
@@ -0,0 +1,206 @@
+"""
+ペルソナ選定結果のキャッシュ
+
+ターゲット記述から抽出した選定条件 (年齢・地域・職業等の語句) をキーに選定結果を
+SQLite に保存する。空白・全角/半角・条件の順序だけが異なる記述は同じキーになる。
+ペルソナデータのバージョンが変わった場合は既存エントリを破棄する。
+"""
+
+import hashlib
+import json
+import re
+import sqlite3
+import time
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# 都道府県 (「東京」「大阪」等の略称も同じ都道府県として扱う)
+PREFECTURES = [
+    "北海道", "青森県", "岩手県", "宮城県", "秋田県", "山形県", "福島県",
+    "茨城県", "栃木県", "群馬県", "埼玉県", "千葉県", "東京都", "神奈川県",
+    "新潟県", "富山県", "石川県", "福井県", "山梨県", "長野県", "岐阜県",
+    "静岡県", "愛知県", "三重県", "滋賀県", "京都府", "大阪府", "兵庫県",
+    "奈良県", "和歌山県", "鳥取県", "島根県", "岡山県", "広島県", "山口県",
+    "徳島県", "香川県", "愛媛県", "高知県", "福岡県", "佐賀県", "長崎県",
+    "熊本県", "大分県", "宮崎県", "鹿児島県", "沖縄県"
+]
+_PREFECTURE_NAMES = {name: name for name in PREFECTURES}
+_PREFECTURE_NAMES.update({name[:-1]: name for name in PREFECTURES if name != "北海道"})
+
+# 年齢表現 (前後の助詞「の」を含む)
+_AGE_DECADE = re.compile(r"の?(\d+)代(前半|後半)?の?")
+_AGE_YEARS = re.compile(r"の?(\d+)歳の?")
+# 地域表現 (「東京在住の」「の大阪府」等、長い名前を優先)
+_REGION = re.compile(
+    "の?(" + "|".join(sorted(map(re.escape, _PREFECTURE_NAMES), key=len, reverse=True)) + ")(?:在住|出身)?の?"
+)
+# 語句の区切り (記号のみ。空白は区切りとしない)
+_SEPARATORS = re.compile(r"[、。,.・/／|｜「」()（）\[\]]+")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_target(target_description: str) -> Dict:
+    """
+    ターゲット記述を選定条件 (年齢・地域・職業等) に変換
+
+    NemotronPersonaSelector と同じく年齢・地域を抽出し、残りを職業等の語句とする。
+    キーは選定条件で決まるため、条件の順序や助詞「の」の有無が違うだけの記述は同じキーになる。
+
+    - 全角/半角・大文字/小文字を統一 (NFKC)
+    - 年齢表現を抽出 (「30代の」「の30代」の「の」も除去)
+    - 都道府県を抽出 (「東京在住」「東京」は「東京都」)
+    - 残りから空白を除去し、記号で区切った語句の集合にする
+
+    例: "東京在住の30代ITエンジニア" と "30代の東京在住ITエンジニア"、
+        "IT エンジニア 30代" と "30代のITエンジニア" はそれぞれ同じ条件になる
+
+    Args:
+        target_description: ターゲット記述
+
+    Returns:
+        {"ages": [...], "regions": [...], "terms": [...]} (いずれもソート済み)
+    """
+    text = unicodedata.normalize("NFKC", target_description).lower()
+
+    ages = [f"{m.group(1)}代{m.group(2) or ''}" for m in _AGE_DECADE.finditer(text)]
+    text = _AGE_DECADE.sub("、", text)
+    ages += [f"{m.group(1)}歳" for m in _AGE_YEARS.finditer(text)]
+    text = _AGE_YEARS.sub("、", text)
+
+    regions = {_PREFECTURE_NAMES[m.group(1)] for m in _REGION.finditer(text)}
+    text = _REGION.sub("、", text)
+
+    text = _SPACES.sub("", text)
+    terms = {term for term in _SEPARATORS.split(text) if term}
+    return {"ages": sorted(set(ages)), "regions": sorted(regions), "terms": sorted(terms)}
+
+
+class SelectionCache:
+    """
+    ペルソナ選定結果のキャッシュ (SQLite)
+
+    最大件数を超えた場合は最終アクセスが古いものから削除する。
+    """
+
+    def __init__(self, db_path: str, store_version: str, max_entries: int = 1000):
+        """
+        初期化
+
+        Args:
+            db_path: キャッシュファイル
+            store_version: ペルソナデータのバージョン (変更時はキャッシュを破棄)
+            max_entries: 最大保持件数
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.store_version = store_version
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._conn = sqlite3.connect(str(self.db_path))
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS selections (
+                key TEXT PRIMARY KEY,
+                store_version TEXT NOT NULL,
+                conditions TEXT NOT NULL,
+                personas TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        deleted = self._conn.execute(
+            "DELETE FROM selections WHERE store_version != ?", (store_version,)
+        ).rowcount
+        self._conn.commit()
+
+        if deleted:
+            print(f"  🗑️ 選定キャッシュ: データ更新のため{deleted}件を破棄")
+
+    def make_key(self, target_description: str, **params) -> str:
+        """正規化条件と選定パラメータからキャッシュキー生成"""
+        conditions = normalize_target(target_description)
+        conditions.update(params)
+        payload = json.dumps(conditions, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def get(self, target_description: str, **params) -> Optional[List[Dict]]:
+        """
+        キャッシュ取得
+
+        Args:
+            target_description: ターゲット記述
+            **params: 選定パラメータ (max_results 等)
+
+        Returns:
+            ペルソナリスト (キャッシュなしの場合 None)
+        """
+        key = self.make_key(target_description, **params)
+        row = self._conn.execute(
+            "SELECT personas FROM selections WHERE key = ? AND store_version = ?",
+            (key, self.store_version)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        self._conn.execute("UPDATE selections SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, target_description: str, personas: List[Dict], **params):
+        """
+        キャッシュ保存
+
+        Args:
+            target_description: ターゲット記述
+            personas: 選定結果
+            **params: 選定パラメータ (max_results 等)
+        """
+        key = self.make_key(target_description, **params)
+        conditions = normalize_target(target_description)
+        conditions.update(params)
+        now = time.time()
+
+        self._conn.execute(
+            "INSERT OR REPLACE INTO selections VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                key,
+                self.store_version,
+                json.dumps(conditions, ensure_ascii=False, sort_keys=True),
+                json.dumps(personas, ensure_ascii=False, default=str),
+                now,
+                now
+            )
+        )
+        self._conn.execute(
+            """
+            DELETE FROM selections WHERE key IN (
+                SELECT key FROM selections ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,)
+        )
+        self._conn.commit()
+
+    def stats(self) -> Dict:
+        """キャッシュ統計 (ヒット数・ミス数・ヒット率・件数)"""
+        total = self.hits + self.misses
+        size = self._conn.execute("SELECT COUNT(*) FROM selections").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "size": size,
+            "max_entries": self.max_entries
+        }
+
+    def close(self):
+        """接続クローズ"""
+        self._conn.close()
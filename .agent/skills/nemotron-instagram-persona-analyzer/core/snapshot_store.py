@@ -0,0 +1,298 @@
+"""
+Instagram データのスナップショット保存・読み込み
+
+取得した投稿・プロフィールを圧縮ブロック単位でディスクに保存し、
+投稿ID・キーワードから必要なブロックだけを遅延読み込みする。
+
+ファイル構成:
+    snapshot_dir/
+    ├── data.bin      # zlib 圧縮した JSONL ブロックの連結 (1検索結果 = 1ブロック)
+    ├── index.jsonl   # ブロックごとの位置・種別・キーワード・ID一覧 (追記)
+    └── meta.json     # 取得条件等のメタデータ (close 時に書き出し)
+"""
+
+import json
+import mmap
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+SNAPSHOT_FORMAT_VERSION = 1
+
+
+def _post_id(post: Dict) -> Optional[str]:
+    """投稿ID (ApifyInstagramClient の重複削除と同じ基準)"""
+    return post.get("id") or post.get("shortCode")
+
+
+def _profile_id(profile: Dict) -> Optional[str]:
+    """プロフィールID (ApifyInstagramClient の重複削除と同じ基準)"""
+    return profile.get("id") or profile.get("username")
+
+
+def check_snapshot_dir(snapshot_dir: str):
+    """
+    保存先に既存のスナップショットがないことを確認 (取得を始める前の確認用)
+
+    Raises:
+        FileExistsError: 既存のスナップショットがある場合 (別の取得結果と混ざるため)
+    """
+    path = Path(snapshot_dir)
+    existing = [name for name in ("data.bin", "index.jsonl", "meta.json") if (path / name).exists()]
+    if existing:
+        raise FileExistsError(
+            f"スナップショットが既に存在します (別のディレクトリを指定してください): {path}"
+        )
+
+
+class SnapshotWriter:
+    """
+    スナップショット書き込み
+
+    検索結果を受け取るたびに1ブロックとして追記するため、
+    取得途中で中断しても書き込み済みのブロックは読み込める。
+    """
+
+    def __init__(self, snapshot_dir: str):
+        """
+        初期化
+
+        Args:
+            snapshot_dir: 保存先ディレクトリ (存在しない場合は作成、空であること)
+
+        Raises:
+            FileExistsError: 既存のスナップショットがある場合 (別の取得結果と混ざるため)
+        """
+        self.path = Path(snapshot_dir)
+        check_snapshot_dir(snapshot_dir)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+        self._data = open(self.path / "data.bin", "ab")
+        self._index = open(self.path / "index.jsonl", "a", encoding="utf-8")
+        self._offset = self._data.tell()
+        self.total_posts = 0
+        self.total_profiles = 0
+
+    def write_posts(self, keyword: str, posts: List[Dict]):
+        """投稿ブロック追記"""
+        self._write_block("posts", keyword, posts, [_post_id(p) for p in posts])
+        self.total_posts += len(posts)
+
+    def write_profiles(self, keyword: str, profiles: List[Dict]):
+        """プロフィールブロック追記"""
+        self._write_block("profiles", keyword, profiles, [_profile_id(p) for p in profiles])
+        self.total_profiles += len(profiles)
+
+    def close(self, meta: Optional[Dict] = None):
+        """
+        書き込み終了
+
+        Args:
+            meta: 追加メタデータ (ターゲット記述、選定ペルソナ、キーワード等)
+        """
+        if self._data.closed:
+            return
+
+        self._data.close()
+        self._index.close()
+
+        meta_data = {
+            "version": SNAPSHOT_FORMAT_VERSION,
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "raw_posts": self.total_posts,
+            "raw_profiles": self.total_profiles
+        }
+        meta_data.update(meta or {})
+        with open(self.path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta_data, f, ensure_ascii=False, indent=2, default=str)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write_block(self, kind: str, keyword: str, items: List[Dict], ids: List[Optional[str]]):
+        """1ブロック書き込み (データ → インデックスの順で flush)"""
+        if not items:
+            return
+
+        payload = "\n".join(json.dumps(item, ensure_ascii=False) for item in items)
+        block = zlib.compress(payload.encode("utf-8"), 6)
+
+        self._data.write(block)
+        self._data.flush()
+
+        entry = {
+            "kind": kind,
+            "keyword": keyword,
+            "offset": self._offset,
+            "length": len(block),
+            "ids": ids
+        }
+        self._index.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._index.flush()
+
+        self._offset += len(block)
+
+
+class SnapshotReader:
+    """
+    スナップショット読み込み
+
+    data.bin をメモリマップし、要求された投稿・プロフィールを含む
+    ブロックだけを展開する (直近のブロックは LRU で保持)。
+    """
+
+    def __init__(self, snapshot_dir: str, block_cache_size: int = 8):
+        """
+        初期化
+
+        Args:
+            snapshot_dir: スナップショットディレクトリ
+            block_cache_size: 展開済みブロックの最大保持数
+        """
+        self.path = Path(snapshot_dir)
+        if not (self.path / "index.jsonl").exists():
+            raise FileNotFoundError(f"スナップショットが見つかりません: {self.path}")
+
+        meta_file = self.path / "meta.json"
+        self.meta = json.loads(meta_file.read_text(encoding="utf-8")) if meta_file.exists() else {}
+
+        self._blocks: List[Dict] = []
+        self._post_index: Dict[str, Tuple[int, int]] = {}
+        self._profile_index: Dict[str, Tuple[int, int]] = {}
+        self._keyword_index: Dict[str, Dict[str, None]] = {}
+        self._load_index()
+
+        self._file = open(self.path / "data.bin", "rb")
+        size = self._file.seek(0, 2)
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+        self._block_cache: "OrderedDict[int, List[str]]" = OrderedDict()
+        self._block_cache_size = block_cache_size
+
+    @property
+    def post_ids(self) -> List[str]:
+        """重複削除済み投稿IDリスト (取得順)"""
+        return list(self._post_index)
+
+    @property
+    def profile_ids(self) -> List[str]:
+        """重複削除済みプロフィールIDリスト (取得順)"""
+        return list(self._profile_index)
+
+    @property
+    def keywords(self) -> List[str]:
+        """投稿を取得したキーワードリスト (取得順)"""
+        return list(self._keyword_index)
+
+    def get_post(self, post_id: str) -> Optional[Dict]:
+        """投稿IDから投稿取得"""
+        location = self._post_index.get(post_id)
+        return self._read_item(*location) if location else None
+
+    def get_profile(self, profile_id: str) -> Optional[Dict]:
+        """プロフィールID (またはユーザー名) からプロフィール取得"""
+        location = self._profile_index.get(profile_id)
+        return self._read_item(*location) if location else None
+
+    def iter_posts(self, keyword: Optional[str] = None) -> Iterator[Dict]:
+        """
+        投稿を順に読み込み (重複削除済み)
+
+        Args:
+            keyword: 指定時はそのキーワードで取得された投稿のみ
+        """
+        ids = self._keyword_index.get(keyword, {}) if keyword is not None else self._post_index
+        for post_id in ids:
+            yield self.get_post(post_id)
+
+    def iter_profiles(self) -> Iterator[Dict]:
+        """プロフィールを順に読み込み (重複削除済み)"""
+        for profile_id in self._profile_index:
+            yield self.get_profile(profile_id)
+
+    def to_instagram_data(self) -> Dict:
+        """
+        ApifyInstagramClient.search_combined と同じ形式の辞書を復元
+
+        Returns:
+            統合Instagram データ (レポート再生成・再統合用)
+        """
+        posts = list(self.iter_posts())
+        profiles = list(self.iter_profiles())
+        return {
+            "posts": posts,
+            "profiles": profiles,
+            "keywords": self.meta.get("keywords", self.keywords),
+            "total_posts": len(posts),
+            "total_profiles": len(profiles),
+            "coverage": self.meta.get("coverage")
+        }
+
+    def summary(self) -> Dict:
+        """生データを含まない要約 (長期保持する結果用)"""
+        return {
+            "keywords": self.meta.get("keywords", self.keywords),
+            "total_posts": len(self._post_index),
+            "total_profiles": len(self._profile_index),
+            "coverage": self.meta.get("coverage"),
+            "snapshot_path": str(self.path)
+        }
+
+    def close(self):
+        """ファイルクローズ"""
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _load_index(self):
+        """index.jsonl から投稿・プロフィール・キーワードの索引を構築"""
+        with open(self.path / "index.jsonl", encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                block_no = len(self._blocks)
+                self._blocks.append(entry)
+
+                if entry["kind"] == "posts":
+                    index = self._post_index
+                    keyword_ids = self._keyword_index.setdefault(entry["keyword"], {})
+                else:
+                    index = self._profile_index
+                    keyword_ids = None
+
+                for row, item_id in enumerate(entry["ids"]):
+                    if not item_id:
+                        continue
+                    index.setdefault(item_id, (block_no, row))
+                    if keyword_ids is not None:
+                        keyword_ids[item_id] = None
+
+    def _read_item(self, block_no: int, row: int) -> Dict:
+        """ブロック展開 (キャッシュ経由) して1件取得"""
+        lines = self._block_cache.get(block_no)
+        if lines is None:
+            entry = self._blocks[block_no]
+            start = entry["offset"]
+            raw = self._mmap[start:start + entry["length"]]
+            lines = zlib.decompress(raw).decode("utf-8").split("\n")
+            self._block_cache[block_no] = lines
+            if len(self._block_cache) > self._block_cache_size:
+                self._block_cache.popitem(last=False)
+        else:
+            self._block_cache.move_to_end(block_no)
+
+        return json.loads(lines[row])